@@ -0,0 +1,203 @@
+import os
+import sys
+import math
+import mmap
+import struct
+import hashlib
+
+# 排序后的哈希文件：每条记录为20字节的SHA-1原始摘要，按字节序升序排列
+RECORD_SIZE = 20
+
+# 布隆过滤器文件头：魔数 + 位数(m) + 哈希函数个数(k) + 来源哈希文件的记录数和指纹
+BLOOM_MAGIC = b'ACMBLOM2'
+BLOOM_HEADER = struct.Struct('<8sQIQ20s')
+
+
+def _hash_file_fingerprint(path):
+    """返回哈希文件的 (记录数, 指纹)，指纹取首尾记录和文件大小的SHA-1，用于校验布隆过滤器是否由该文件生成"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        first = f.read(RECORD_SIZE)
+        f.seek(max(size - RECORD_SIZE, 0))
+        last = f.read(RECORD_SIZE)
+    fingerprint = hashlib.sha1(size.to_bytes(8, 'little') + first + last).digest()
+    return size // RECORD_SIZE, fingerprint
+
+
+def _bloom_positions(digest, num_bits, num_hashes):
+    """由SHA-1摘要派生布隆过滤器的位位置（双重哈希）"""
+    h1 = int.from_bytes(digest[0:8], 'little')
+    h2 = int.from_bytes(digest[8:16], 'little') | 1
+    return [(h1 + i * h2) % num_bits for i in range(num_hashes)]
+
+
+class BloomFilter:
+    """基于内存映射文件的只读布隆过滤器"""
+    def __init__(self, path):
+        if os.path.getsize(path) < BLOOM_HEADER.size:
+            raise ValueError(f"无效的布隆过滤器文件: {path}")
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(BLOOM_MAGIC)] != BLOOM_MAGIC:
+            self.close()
+            raise ValueError(f"无效或旧版本的布隆过滤器文件: {path}")
+        magic, self.num_bits, self.num_hashes, self.record_count, self.fingerprint = BLOOM_HEADER.unpack_from(self.mm, 0)
+        # 位数或哈希函数个数为0的过滤器（文件损坏）会除零或对所有输入都返回“可能存在”
+        if not self.num_bits or not self.num_hashes or len(self.mm) < BLOOM_HEADER.size + self.num_bits // 8:
+            self.close()
+            raise ValueError(f"无效的布隆过滤器文件: {path}")
+
+    def might_contain(self, digest):
+        """返回False表示一定不存在，True表示可能存在"""
+        offset = BLOOM_HEADER.size
+        for pos in _bloom_positions(digest, self.num_bits, self.num_hashes):
+            if not self.mm[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+
+class BreachedHashFile:
+    """在排序的定长哈希文件上做二分查找，文件通过mmap访问而不载入内存"""
+    def __init__(self, path, bloom_path=None):
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        if size % RECORD_SIZE:
+            self.file.close()
+            raise ValueError(f"哈希文件长度不是 {RECORD_SIZE} 字节的整数倍: {path}")
+        self.count = size // RECORD_SIZE
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+        # 未指定时自动使用同名的 .bloom 文件；与哈希文件不匹配的过滤器会产生漏报，不能使用
+        self.bloom = None
+        explicit = bloom_path is not None
+        if not explicit and os.path.exists(path + '.bloom'):
+            bloom_path = path + '.bloom'
+        if bloom_path:
+            try:
+                bloom = BloomFilter(bloom_path)
+            except ValueError:
+                if explicit:
+                    self.close()
+                    raise
+                bloom = None
+            if bloom and (bloom.record_count, bloom.fingerprint) != _hash_file_fingerprint(path):
+                bloom.close()
+                if explicit:
+                    self.close()
+                    raise ValueError(f"布隆过滤器 {bloom_path} 不是由 {path} 生成的，请重新生成")
+                bloom = None
+            self.bloom = bloom
+
+    def contains_digest(self, digest):
+        """判断20字节SHA-1摘要是否在泄露列表中"""
+        if self.mm is None:
+            return False
+        if self.bloom and not self.bloom.might_contain(digest):
+            return False
+
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = mid * RECORD_SIZE
+            record = self.mm[offset:offset + RECORD_SIZE]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def contains_password(self, password):
+        """判断明文密码是否在泄露列表中"""
+        return self.contains_digest(hashlib.sha1(password.encode('utf-8')).digest())
+
+    def close(self):
+        if self.bloom:
+            self.bloom.close()
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self.file.close()
+
+
+def audit_accounts(accounts, hash_file, progress=None):
+    """检查账号列表中的密码，返回已泄露的账号；progress(已完成数, 总数) 用于汇报进度"""
+    breached = []
+    total = len(accounts)
+    for i, account in enumerate(accounts, 1):
+        if hash_file.contains_password(account['password']):
+            breached.append(account)
+        if progress and (i % 100 == 0 or i == total):
+            progress(i, total)
+    return breached
+
+
+def build_hash_file(text_path, out_path):
+    """将按哈希排序的 "SHA1:次数" 文本列表转换为定长二进制哈希文件，返回记录数"""
+    # 旧的布隆过滤器对应旧的哈希文件，保留会导致漏报
+    if os.path.exists(out_path + '.bloom'):
+        os.remove(out_path + '.bloom')
+    count = 0
+    previous = b''
+    with open(text_path, 'r', encoding='ascii') as src, open(out_path, 'wb') as dst:
+        for line in src:
+            hex_hash = line.split(':', 1)[0].strip()
+            if not hex_hash:
+                continue
+            digest = bytes.fromhex(hex_hash)
+            if len(digest) != RECORD_SIZE:
+                raise ValueError(f"无效的SHA-1哈希: {hex_hash}")
+            if digest < previous:
+                raise ValueError("输入文件未按哈希排序，请下载按哈希排序的版本")
+            if digest == previous:
+                continue
+            dst.write(digest)
+            previous = digest
+            count += 1
+    return count
+
+
+def build_bloom_filter(hash_path, out_path, false_positive_rate=0.001):
+    """为二进制哈希文件生成布隆过滤器文件，位数组直接写在mmap上"""
+    count, fingerprint = _hash_file_fingerprint(hash_path)
+    num_bits = max(8, int(-count * math.log(false_positive_rate) / (math.log(2) ** 2)))
+    num_bits = (num_bits + 7) // 8 * 8
+    num_hashes = max(1, round(num_bits / max(count, 1) * math.log(2)))
+
+    with open(out_path, 'wb') as dst:
+        dst.write(BLOOM_HEADER.pack(BLOOM_MAGIC, num_bits, num_hashes, count, fingerprint))
+        dst.truncate(BLOOM_HEADER.size + num_bits // 8)
+
+    offset = BLOOM_HEADER.size
+    with open(out_path, 'r+b') as dst, open(hash_path, 'rb') as src:
+        mm = mmap.mmap(dst.fileno(), 0)
+        try:
+            while True:
+                digest = src.read(RECORD_SIZE)
+                if len(digest) < RECORD_SIZE:
+                    break
+                for pos in _bloom_positions(digest, num_bits, num_hashes):
+                    mm[offset + (pos >> 3)] |= 1 << (pos & 7)
+            mm.flush()
+        finally:
+            mm.close()
+    return num_bits, num_hashes
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or (len(sys.argv) == 4 and sys.argv[3] != "--bloom"):
+        print("用法: python breach_check.py <按哈希排序的SHA1文本列表> <输出文件> [--bloom]")
+        sys.exit(1)
+
+    print(f"正在转换 {sys.argv[1]} ...")
+    records = build_hash_file(sys.argv[1], sys.argv[2])
+    print(f"已写入 {records} 条哈希记录到 {sys.argv[2]}")
+    if len(sys.argv) == 4:
+        print("正在生成布隆过滤器...")
+        build_bloom_filter(sys.argv[2], sys.argv[2] + '.bloom')
+        print(f"布隆过滤器已写入 {sys.argv[2]}.bloom")
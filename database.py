@@ -3,22 +3,152 @@ import os
 import hashlib
 import base64
 import secrets
-from datetime import datetime
+import time
+from datetime import datetime, timezone
+
+# 附件按固定大小分块加密存储
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+
+# 数据库维护：每次增量回收的页数，以及 optimize / quick_check 的执行间隔（秒）
+VACUUM_STEP_PAGES = 128
+OPTIMIZE_INTERVAL = 24 * 3600
+QUICK_CHECK_INTERVAL = 7 * 24 * 3600
+
+# 未启用增量 auto_vacuum 的旧数据库在维护报告中附带的提示
+LEGACY_VACUUM_NOTE = "数据库未启用增量回收，删除数据留下的空闲页不会被回收，请运行 python main.py maintenance --convert 转换一次"
+
+def _pragma_value(cursor, name):
+    """读取单值 PRAGMA"""
+    cursor.execute(f"PRAGMA {name}")
+    return cursor.fetchone()[0]
+
+def _task_due(cursor, task, interval, now):
+    """判断维护任务距上次执行是否已超过间隔"""
+    cursor.execute("SELECT last_run FROM maintenance_state WHERE task = ?", (task,))
+    row = cursor.fetchone()
+    return row is None or now - row[0] >= interval
+
+def _mark_task_run(cursor, task, now):
+    cursor.execute(
+        "INSERT OR REPLACE INTO maintenance_state (task, last_run) VALUES (?, ?)",
+        (task, now)
+    )
+
+def incremental_vacuum(conn, max_pages=VACUUM_STEP_PAGES):
+    """回收最多 max_pages 个空闲页，返回实际回收的页数（需启用增量 auto_vacuum）"""
+    cursor = conn.cursor()
+    before = _pragma_value(cursor, "freelist_count")
+    if before == 0 or _pragma_value(cursor, "auto_vacuum") != 2:
+        return 0
+    # incremental_vacuum 每执行一步回收一页，execute 只执行一步，用 executescript 执行到底
+    conn.commit()
+    cursor.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+    return before - _pragma_value(cursor, "freelist_count")
+
+def run_maintenance(conn, max_pages=VACUUM_STEP_PAGES, force=False):
+    """执行一轮小步维护：增量回收空闲页，按间隔执行 optimize 和 quick_check，返回维护报告
+    
+    只使用传入的连接，不需要主密码，后台线程可以用自己打开的连接调用；
+    每次只回收少量页，不会像完整 VACUUM 那样长时间阻塞。
+    force 为 True 时忽略间隔立即执行 optimize 和 quick_check。
+    """
+    started = time.perf_counter()
+    now = time.time()
+    cursor = conn.cursor()
+    report = {
+        'reclaimed_pages': incremental_vacuum(conn, max_pages),
+        'freelist_pages': _pragma_value(cursor, "freelist_count"),
+        'page_size': _pragma_value(cursor, "page_size"),
+        'incremental_vacuum': _pragma_value(cursor, "auto_vacuum") == 2,
+        'optimized': False,
+        'integrity': None
+    }
+    if not report['incremental_vacuum']:
+        report['note'] = LEGACY_VACUUM_NOTE
+        
+    if force or _task_due(cursor, "optimize", OPTIMIZE_INTERVAL, now):
+        # 从未收集过统计信息时先做一次 ANALYZE，之后由 optimize 按需更新
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            cursor.execute("ANALYZE")
+        cursor.execute("PRAGMA optimize")
+        cursor.fetchall()
+        _mark_task_run(cursor, "optimize", now)
+        report['optimized'] = True
+        
+    if force or _task_due(cursor, "quick_check", QUICK_CHECK_INTERVAL, now):
+        cursor.execute("PRAGMA quick_check")
+        problems = [row[0] for row in cursor.fetchall()]
+        report['integrity'] = "ok" if problems == ["ok"] else "; ".join(problems)
+        _mark_task_run(cursor, "quick_check", now)
+        
+    conn.commit()
+    report['elapsed'] = time.perf_counter() - started
+    return report
+
+def decrypt_password(master_key, encrypted_password):
+    """用主密钥解密密码；不依赖 Database 实例，后台线程可直接调用"""
+    try:
+        # 解码base64
+        encrypted_bytes = base64.b64decode(encrypted_password)
+        # 提取IV和密文
+        iv = encrypted_bytes[:8]
+        encrypted_data = encrypted_bytes[8:]
+        
+        # 使用XOR操作解密
+        key_bytes = master_key
+        # 确保密钥足够长
+        while len(key_bytes) < len(encrypted_data):
+            key_bytes += key_bytes
+            
+        # 执行XOR解密
+        decrypted = bytearray()
+        for i in range(len(encrypted_data)):
+            decrypted.append(encrypted_data[i] ^ key_bytes[i % len(key_bytes)])
+            
+        return bytes(decrypted).decode('utf-8')
+    except:
+        return "解密失败"
+
+def read_all_accounts(conn, master_key):
+    """在给定连接上读取并解密所有账号，供后台线程用独立连接调用"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, site_name, username, password, notes FROM accounts ORDER BY site_name")
+    accounts = []
+    for row in cursor.fetchall():
+        account = {
+            'id': row[0],
+            'site_name': row[1],
+            'username': row[2],
+            'password': decrypt_password(master_key, row[3]),
+            'notes': row[4]
+        }
+        accounts.append(account)
+    return accounts
 
 class Database:
-    def __init__(self, master_password):
+    def __init__(self, master_password, db_file=None):
         """初始化数据库连接并设置主密码"""
-        # 使用固定路径存储数据库文件
-        user_home = os.path.expanduser("~")
-        app_data_dir = os.path.join(user_home, "AccountManager")
-        
-        # 确保目录存在
-        if not os.path.exists(app_data_dir):
-            os.makedirs(app_data_dir)
+        if db_file is None:
+            # 使用固定路径存储数据库文件
+            user_home = os.path.expanduser("~")
+            app_data_dir = os.path.join(user_home, "AccountManager")
+            
+            # 确保目录存在
+            if not os.path.exists(app_data_dir):
+                os.makedirs(app_data_dir)
+                
+            db_file = os.path.join(app_data_dir, "accounts.db")
             
-        self.db_file = os.path.join(app_data_dir, "accounts.db")
+        self.db_file = db_file
         self.conn = sqlite3.connect(self.db_file)
+        self.conn.execute("PRAGMA foreign_keys = ON")
         self.cursor = self.conn.cursor()
+        
+        # auto_vacuum 只能在建表前设置，新数据库直接启用增量回收
+        self.cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+        if self.cursor.fetchone()[0] == 0:
+            self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
         self.create_tables()
         
         # 使用主密码生成加密密钥
@@ -44,11 +174,147 @@ class Database:
             username TEXT NOT NULL,
             password TEXT NOT NULL,
             notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            uuid TEXT,
+            updated_at TIMESTAMP,
+            change_seq INTEGER
+        )
+        ''')
+        
+        # 同步用表：删除记录（墓碑）、同步元数据、对端同步点
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tombstones (
+            uuid TEXT PRIMARY KEY,
+            deleted_at TIMESTAMP NOT NULL,
+            change_seq INTEGER NOT NULL
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_meta (
+            key TEXT PRIMARY KEY,
+            value
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            peer_id TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        # 报告模式下未解决的冲突，下次同步时重新比较
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_conflicts (
+            peer_id TEXT NOT NULL,
+            uuid TEXT NOT NULL,
+            PRIMARY KEY (peer_id, uuid)
+        ) WITHOUT ROWID
+        ''')
+        
+        self._upgrade_accounts_table()
+        
+        self.cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_accounts_uuid ON accounts (uuid)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_accounts_change_seq ON accounts (change_seq)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_tombstones_change_seq ON tombstones (change_seq)")
+        
+        # 附件：元数据与分块数据分表存储，列表查询不会读取附件内容
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS attachments (
+            id INTEGER PRIMARY KEY,
+            account_id INTEGER NOT NULL REFERENCES accounts (id) ON DELETE CASCADE,
+            filename TEXT NOT NULL,
+            size INTEGER NOT NULL DEFAULT 0,
+            nonce BLOB NOT NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS attachment_chunks (
+            attachment_id INTEGER NOT NULL REFERENCES attachments (id) ON DELETE CASCADE,
+            chunk_index INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (attachment_id, chunk_index)
+        ) WITHOUT ROWID
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_attachments_account_id ON attachments (account_id)")
+        
+        # 标签：多对多映射，account_count 由触发器维护，侧边栏无需 COUNT(*)
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+            account_count INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS account_tags (
+            account_id INTEGER NOT NULL REFERENCES accounts (id) ON DELETE CASCADE,
+            tag_id INTEGER NOT NULL REFERENCES tags (id) ON DELETE CASCADE,
+            PRIMARY KEY (account_id, tag_id)
+        ) WITHOUT ROWID
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_account_tags_tag_id ON account_tags (tag_id, account_id)")
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_account_tags_insert AFTER INSERT ON account_tags
+        BEGIN
+            UPDATE tags SET account_count = account_count + 1 WHERE id = NEW.tag_id;
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_account_tags_delete AFTER DELETE ON account_tags
+        BEGIN
+            UPDATE tags SET account_count = account_count - 1 WHERE id = OLD.tag_id;
+        END
+        ''')
+        
+        # 维护任务上次执行时间（Unix时间戳）
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_state (
+            task TEXT PRIMARY KEY,
+            last_run REAL NOT NULL
+        )
+        ''')
+        
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('vault_id', ?)",
+            (secrets.token_hex(16),)
+        )
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO sync_meta (key, value) "
+            "VALUES ('change_seq', (SELECT COALESCE(MAX(change_seq), 0) FROM accounts))"
+        )
         self.conn.commit()
         
+    def _upgrade_accounts_table(self):
+        """为旧版数据库补充同步所需的列并回填数据"""
+        self.cursor.execute("PRAGMA table_info(accounts)")
+        columns = [row[1] for row in self.cursor.fetchall()]
+        for column, column_type in (("uuid", "TEXT"), ("updated_at", "TIMESTAMP"), ("change_seq", "INTEGER")):
+            if column not in columns:
+                self.cursor.execute(f"ALTER TABLE accounts ADD COLUMN {column} {column_type}")
+                
+        # 旧记录：全局唯一ID由记录内容确定性生成。旧版本只能直接复制数据库文件，
+        # 两份副本升级后同一条记录得到相同的ID，首次同步不会重复；
+        # 任一字段在某一端被改过的记录ID不同，两端都会保留，不会静默丢失修改
+        self.cursor.execute(
+            "SELECT id, created_at, site_name, username, password, notes FROM accounts WHERE uuid IS NULL"
+        )
+        for row in self.cursor.fetchall():
+            digest = hashlib.sha256("\0".join(str(value) for value in row).encode('utf-8')).hexdigest()
+            self.cursor.execute("UPDATE accounts SET uuid = ? WHERE id = ?", (digest[:32], row[0]))
+        # 修改时间取创建时间，变更序号取行ID
+        self.cursor.execute("UPDATE accounts SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL")
+        self.cursor.execute("UPDATE accounts SET change_seq = id WHERE change_seq IS NULL")
+        
+    def _now(self):
+        """返回可按字符串比较的UTC时间戳"""
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')
+        
+    def _next_change_seq(self):
+        """分配下一个变更序号（不提交事务）"""
+        self.cursor.execute("UPDATE sync_meta SET value = value + 1 WHERE key = 'change_seq'")
+        self.cursor.execute("SELECT value FROM sync_meta WHERE key = 'change_seq'")
+        return self.cursor.fetchone()[0]
+        
     def encrypt_password(self, password):
         """简单加密密码"""
         # 使用XOR操作加密
@@ -70,52 +336,63 @@ class Database:
         
     def decrypt_password(self, encrypted_password):
         """解密密码"""
-        try:
-            # 解码base64
-            encrypted_bytes = base64.b64decode(encrypted_password)
-            # 提取IV和密文
-            iv = encrypted_bytes[:8]
-            encrypted_data = encrypted_bytes[8:]
-            
-            # 使用XOR操作解密
-            key_bytes = self.master_key
-            # 确保密钥足够长
-            while len(key_bytes) < len(encrypted_data):
-                key_bytes += key_bytes
-                
-            # 执行XOR解密
-            decrypted = bytearray()
-            for i in range(len(encrypted_data)):
-                decrypted.append(encrypted_data[i] ^ key_bytes[i % len(key_bytes)])
-                
-            return bytes(decrypted).decode('utf-8')
-        except:
-            return "解密失败"
+        return decrypt_password(self.master_key, encrypted_password)
     
     def add_account(self, site_name, username, password, notes=""):
         """添加新账号"""
         encrypted_password = self.encrypt_password(password)
         self.cursor.execute(
-            "INSERT INTO accounts (site_name, username, password, notes) VALUES (?, ?, ?, ?)",
-            (site_name, username, encrypted_password, notes)
+            "INSERT INTO accounts (site_name, username, password, notes, uuid, updated_at, change_seq) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (site_name, username, encrypted_password, notes,
+             secrets.token_hex(16), self._now(), self._next_change_seq())
         )
         self.conn.commit()
         return self.cursor.lastrowid
         
+    def import_accounts(self, accounts):
+        """批量添加账号（单个事务），返回新账号ID列表"""
+        ids = []
+        try:
+            for account in accounts:
+                self.cursor.execute(
+                    "INSERT INTO accounts (site_name, username, password, notes, uuid, updated_at, change_seq) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (account['site_name'], account['username'], self.encrypt_password(account['password']),
+                     account.get('notes') or "", secrets.token_hex(16), self._now(), self._next_change_seq())
+                )
+                ids.append(self.cursor.lastrowid)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return ids
+        
+    def get_account(self, account_id):
+        """按ID获取账号信息，不存在时返回None"""
+        self.cursor.execute("SELECT id, site_name, username, password, notes FROM accounts WHERE id = ?", (account_id,))
+        row = self.cursor.fetchone()
+        if not row:
+            return None
+        return {
+            'id': row[0],
+            'site_name': row[1],
+            'username': row[2],
+            'password': self.decrypt_password(row[3]),
+            'notes': row[4]
+        }
+        
     def get_all_accounts(self):
         """获取所有账号信息"""
-        self.cursor.execute("SELECT id, site_name, username, password, notes FROM accounts ORDER BY site_name")
-        accounts = []
-        for row in self.cursor.fetchall():
-            account = {
-                'id': row[0],
-                'site_name': row[1],
-                'username': row[2],
-                'password': self.decrypt_password(row[3]),
-                'notes': row[4]
-            }
-            accounts.append(account)
-        return accounts
+        return read_all_accounts(self.conn, self.master_key)
+        
+    def list_accounts(self):
+        """获取所有账号的基本信息（不读取和解密密码）"""
+        self.cursor.execute("SELECT id, site_name, username, notes FROM accounts ORDER BY site_name")
+        return [
+            {'id': row[0], 'site_name': row[1], 'username': row[2], 'notes': row[3]}
+            for row in self.cursor.fetchall()
+        ]
         
     def search_accounts(self, keyword):
         """搜索账号信息"""
@@ -138,7 +415,7 @@ class Database:
     def update_account(self, account_id, site_name=None, username=None, password=None, notes=None):
         """更新账号信息"""
         # 获取当前账号信息
-        self.cursor.execute("SELECT * FROM accounts WHERE id = ?", (account_id,))
+        self.cursor.execute("SELECT id, site_name, username, password, notes FROM accounts WHERE id = ?", (account_id,))
         account = self.cursor.fetchone()
         if not account:
             return False
@@ -151,18 +428,388 @@ class Database:
         
         # 执行更新
         self.cursor.execute(
-            "UPDATE accounts SET site_name = ?, username = ?, password = ?, notes = ? WHERE id = ?",
-            (new_site_name, new_username, new_password, new_notes, account_id)
+            "UPDATE accounts SET site_name = ?, username = ?, password = ?, notes = ?, "
+            "updated_at = ?, change_seq = ? WHERE id = ?",
+            (new_site_name, new_username, new_password, new_notes,
+             self._now(), self._next_change_seq(), account_id)
         )
         self.conn.commit()
         return True
         
     def delete_account(self, account_id):
         """删除账号信息"""
+        self.cursor.execute("SELECT uuid FROM accounts WHERE id = ?", (account_id,))
+        row = self.cursor.fetchone()
+        if not row:
+            return False
+            
+        # 记录墓碑，以便同步时将删除传播到其他数据库
         self.cursor.execute("DELETE FROM accounts WHERE id = ?", (account_id,))
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO tombstones (uuid, deleted_at, change_seq) VALUES (?, ?, ?)",
+            (row[0], self._now(), self._next_change_seq())
+        )
+        self.conn.commit()
+        return True
+        
+    def get_vault_id(self):
+        """获取本数据库的唯一标识"""
+        self.cursor.execute("SELECT value FROM sync_meta WHERE key = 'vault_id'")
+        return self.cursor.fetchone()[0]
+        
+    def reset_vault_id(self):
+        """为复制出来的数据库生成新的唯一标识，返回新标识"""
+        vault_id = secrets.token_hex(16)
+        self.cursor.execute("UPDATE sync_meta SET value = ? WHERE key = 'vault_id'", (vault_id,))
+        self.conn.commit()
+        return vault_id
+        
+    def get_change_seq(self):
+        """获取当前最大变更序号"""
+        self.cursor.execute("SELECT value FROM sync_meta WHERE key = 'change_seq'")
+        return self.cursor.fetchone()[0]
+        
+    def get_sync_point(self, peer_id):
+        """获取上次同步到指定对端时的本地变更序号"""
+        self.cursor.execute("SELECT last_seq FROM sync_peers WHERE peer_id = ?", (peer_id,))
+        row = self.cursor.fetchone()
+        return row[0] if row else 0
+        
+    def set_sync_point(self, peer_id, seq):
+        """记录与指定对端的同步点"""
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO sync_peers (peer_id, last_seq) VALUES (?, ?)",
+            (peer_id, seq)
+        )
+        self.conn.commit()
+        
+    def get_pending_conflicts(self, peer_id):
+        """获取与指定对端之间尚未解决的冲突记录"""
+        self.cursor.execute("SELECT uuid FROM sync_conflicts WHERE peer_id = ?", (peer_id,))
+        return [row[0] for row in self.cursor.fetchall()]
+        
+    def set_pending_conflicts(self, peer_id, uuids):
+        """记录与指定对端之间尚未解决的冲突（替换原有记录）"""
+        self.cursor.execute("DELETE FROM sync_conflicts WHERE peer_id = ?", (peer_id,))
+        self.cursor.executemany(
+            "INSERT INTO sync_conflicts (peer_id, uuid) VALUES (?, ?)",
+            [(peer_id, uuid) for uuid in uuids]
+        )
+        self.conn.commit()
+        
+    def _fetch_sync_records(self, where, params):
+        """按条件读取账号和墓碑的同步记录（密码保持加密形式）"""
+        self.cursor.execute(
+            "SELECT uuid, site_name, username, password, notes, created_at, updated_at "
+            f"FROM accounts WHERE {where} ORDER BY change_seq",
+            params
+        )
+        rows = []
+        for row in self.cursor.fetchall():
+            rows.append({
+                'uuid': row[0],
+                'site_name': row[1],
+                'username': row[2],
+                'password': row[3],
+                'notes': row[4],
+                'created_at': row[5],
+                'updated_at': row[6]
+            })
+            
+        self.cursor.execute(
+            f"SELECT uuid, deleted_at FROM tombstones WHERE {where} ORDER BY change_seq",
+            params
+        )
+        tombstones = [{'uuid': row[0], 'deleted_at': row[1]} for row in self.cursor.fetchall()]
+        return rows, tombstones
+        
+    def get_changes_since(self, seq):
+        """获取变更序号大于 seq 的账号和墓碑"""
+        return self._fetch_sync_records("change_seq > ?", (seq,))
+        
+    def get_sync_records(self, uuids):
+        """获取指定记录的当前版本（账号或墓碑）"""
+        uuids = list(uuids)
+        if not uuids:
+            return [], []
+        placeholders = ",".join("?" * len(uuids))
+        return self._fetch_sync_records(f"uuid IN ({placeholders})", uuids)
+        
+    def apply_changes(self, rows, tombstones):
+        """应用来自其他数据库的变更（后写入者优先），返回实际应用的条数"""
+        applied = 0
+        for row in rows:
+            self.cursor.execute("SELECT updated_at FROM accounts WHERE uuid = ?", (row['uuid'],))
+            local = self.cursor.fetchone()
+            if local and local[0] >= row['updated_at']:
+                continue
+            self.cursor.execute("SELECT deleted_at FROM tombstones WHERE uuid = ?", (row['uuid'],))
+            deleted = self.cursor.fetchone()
+            if deleted and deleted[0] >= row['updated_at']:
+                continue
+                
+            seq = self._next_change_seq()
+            if local:
+                self.cursor.execute(
+                    "UPDATE accounts SET site_name = ?, username = ?, password = ?, notes = ?, "
+                    "updated_at = ?, change_seq = ? WHERE uuid = ?",
+                    (row['site_name'], row['username'], row['password'], row['notes'],
+                     row['updated_at'], seq, row['uuid'])
+                )
+            else:
+                self.cursor.execute(
+                    "INSERT INTO accounts (site_name, username, password, notes, created_at, uuid, updated_at, change_seq) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row['site_name'], row['username'], row['password'], row['notes'],
+                     row['created_at'], row['uuid'], row['updated_at'], seq)
+                )
+            if deleted:
+                self.cursor.execute("DELETE FROM tombstones WHERE uuid = ?", (row['uuid'],))
+            applied += 1
+            
+        for tombstone in tombstones:
+            self.cursor.execute("SELECT updated_at FROM accounts WHERE uuid = ?", (tombstone['uuid'],))
+            local = self.cursor.fetchone()
+            if local and local[0] > tombstone['deleted_at']:
+                continue
+            self.cursor.execute("SELECT 1 FROM tombstones WHERE uuid = ?", (tombstone['uuid'],))
+            if not local and self.cursor.fetchone():
+                continue
+                
+            self.cursor.execute("DELETE FROM accounts WHERE uuid = ?", (tombstone['uuid'],))
+            self.cursor.execute(
+                "INSERT OR REPLACE INTO tombstones (uuid, deleted_at, change_seq) VALUES (?, ?, ?)",
+                (tombstone['uuid'], tombstone['deleted_at'], self._next_change_seq())
+            )
+            applied += 1
+            
+        self.conn.commit()
+        return applied
+        
+    def _get_tag_id(self, name, create=False):
+        """按名称查找标签ID，create为True时不存在则创建"""
+        self.cursor.execute("SELECT id FROM tags WHERE name = ?", (name,))
+        row = self.cursor.fetchone()
+        if row:
+            return row[0]
+        if not create:
+            return None
+        self.cursor.execute("INSERT INTO tags (name) VALUES (?)", (name,))
+        return self.cursor.lastrowid
+        
+    def set_account_tags(self, account_id, tag_names):
+        """设置账号的标签（替换原有标签）"""
+        names = []
+        for name in tag_names:
+            name = name.strip()
+            if name and name.lower() not in [n.lower() for n in names]:
+                names.append(name)
+        tag_ids = [self._get_tag_id(name, create=True) for name in names]
+        
+        if tag_ids:
+            placeholders = ",".join("?" * len(tag_ids))
+            self.cursor.execute(
+                f"DELETE FROM account_tags WHERE account_id = ? AND tag_id NOT IN ({placeholders})",
+                [account_id] + tag_ids
+            )
+        else:
+            self.cursor.execute("DELETE FROM account_tags WHERE account_id = ?", (account_id,))
+        self.cursor.executemany(
+            "INSERT OR IGNORE INTO account_tags (account_id, tag_id) VALUES (?, ?)",
+            [(account_id, tag_id) for tag_id in tag_ids]
+        )
+        self.conn.commit()
+        
+    def add_tag(self, account_id, name):
+        """为账号添加一个标签"""
+        tag_id = self._get_tag_id(name.strip(), create=True)
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO account_tags (account_id, tag_id) VALUES (?, ?)",
+            (account_id, tag_id)
+        )
+        self.conn.commit()
+        
+    def remove_tag(self, account_id, name):
+        """移除账号的一个标签"""
+        tag_id = self._get_tag_id(name.strip())
+        if tag_id is None:
+            return False
+        self.cursor.execute(
+            "DELETE FROM account_tags WHERE account_id = ? AND tag_id = ?",
+            (account_id, tag_id)
+        )
         self.conn.commit()
         return self.cursor.rowcount > 0
         
+    def get_account_tags(self, account_id):
+        """获取账号的标签名称列表"""
+        self.cursor.execute(
+            "SELECT t.name FROM account_tags at JOIN tags t ON t.id = at.tag_id "
+            "WHERE at.account_id = ? ORDER BY t.name",
+            (account_id,)
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+        
+    def get_tag_counts(self):
+        """获取所有在用标签及其账号数（读取预先维护的计数）"""
+        self.cursor.execute(
+            "SELECT name, account_count FROM tags WHERE account_count > 0 ORDER BY name"
+        )
+        return [{'name': row[0], 'count': row[1]} for row in self.cursor.fetchall()]
+        
+    def delete_tag(self, name):
+        """删除标签及其与账号的关联"""
+        self.cursor.execute("DELETE FROM tags WHERE name = ?", (name.strip(),))
+        self.conn.commit()
+        return self.cursor.rowcount > 0
+        
+    def filter_accounts_by_tags(self, tag_names, match_all=True, keyword=""):
+        """按标签组合筛选账号；match_all为True时需包含全部标签，否则包含任一标签"""
+        tag_ids = [self._get_tag_id(name.strip()) for name in tag_names]
+        if match_all and None in tag_ids:
+            return []
+        # 标签名不区分大小写，"work" 和 "Work" 是同一个标签，去重后再按个数匹配
+        tag_ids = list(dict.fromkeys(tag_id for tag_id in tag_ids if tag_id is not None))
+        if not tag_ids:
+            return []
+            
+        # 在 (tag_id, account_id) 索引上分组计数，避免扫描账号表
+        placeholders = ",".join("?" * len(tag_ids))
+        query = (
+            "SELECT id, site_name, username, password, notes FROM accounts WHERE id IN ("
+            f"SELECT account_id FROM account_tags WHERE tag_id IN ({placeholders}) "
+            "GROUP BY account_id HAVING COUNT(*) >= ?)"
+        )
+        params = tag_ids + [len(tag_ids) if match_all else 1]
+        if keyword:
+            query += " AND (site_name LIKE ? OR username LIKE ?)"
+            params += [f"%{keyword}%", f"%{keyword}%"]
+        query += " ORDER BY site_name"
+        self.cursor.execute(query, params)
+        
+        accounts = []
+        for row in self.cursor.fetchall():
+            account = {
+                'id': row[0],
+                'site_name': row[1],
+                'username': row[2],
+                'password': self.decrypt_password(row[3]),
+                'notes': row[4]
+            }
+            accounts.append(account)
+        return accounts
+        
+    def _crypt_chunk(self, data, nonce, chunk_index):
+        """用主密钥、附件随机数和块序号派生的密钥流对数据块做异或（加解密相同）"""
+        keystream = hashlib.shake_256(
+            self.master_key + nonce + chunk_index.to_bytes(8, 'big')
+        ).digest(len(data))
+        result = int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')
+        return result.to_bytes(len(data), 'big')
+        
+    def add_attachment(self, account_id, filename, fileobj):
+        """从文件对象流式读取并分块加密保存附件，返回附件ID"""
+        nonce = secrets.token_bytes(16)
+        self.cursor.execute(
+            "INSERT INTO attachments (account_id, filename, nonce) VALUES (?, ?, ?)",
+            (account_id, filename, nonce)
+        )
+        attachment_id = self.cursor.lastrowid
+        
+        size = 0
+        chunk_index = 0
+        try:
+            while True:
+                chunk = fileobj.read(ATTACHMENT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.cursor.execute(
+                    "INSERT INTO attachment_chunks (attachment_id, chunk_index, data) VALUES (?, ?, ?)",
+                    (attachment_id, chunk_index, self._crypt_chunk(chunk, nonce, chunk_index))
+                )
+                size += len(chunk)
+                chunk_index += 1
+            self.cursor.execute("UPDATE attachments SET size = ? WHERE id = ?", (size, attachment_id))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return attachment_id
+        
+    def get_attachments(self, account_id):
+        """获取账号的附件列表（不含内容）"""
+        self.cursor.execute(
+            "SELECT id, filename, size, created_at FROM attachments WHERE account_id = ? ORDER BY id",
+            (account_id,)
+        )
+        attachments = []
+        for row in self.cursor.fetchall():
+            attachments.append({
+                'id': row[0],
+                'filename': row[1],
+                'size': row[2],
+                'created_at': row[3]
+            })
+        return attachments
+        
+    def read_attachment(self, attachment_id):
+        """逐块解密读取附件内容，每次只在内存中保留一个数据块"""
+        self.cursor.execute("SELECT nonce FROM attachments WHERE id = ?", (attachment_id,))
+        row = self.cursor.fetchone()
+        if not row:
+            return
+        nonce = row[0]
+        
+        # 使用独立游标，避免调用方在迭代期间执行其他查询时互相干扰
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT chunk_index, data FROM attachment_chunks WHERE attachment_id = ? ORDER BY chunk_index",
+                (attachment_id,)
+            )
+            for chunk_index, data in cursor:
+                yield self._crypt_chunk(data, nonce, chunk_index)
+        finally:
+            cursor.close()
+            
+    def export_attachment(self, attachment_id, fileobj):
+        """将附件解密写入文件对象，返回写入的字节数"""
+        size = 0
+        for chunk in self.read_attachment(attachment_id):
+            fileobj.write(chunk)
+            size += len(chunk)
+        return size
+        
+    def delete_attachment(self, attachment_id):
+        """删除附件及其全部数据块"""
+        self.cursor.execute("DELETE FROM attachments WHERE id = ?", (attachment_id,))
+        self.conn.commit()
+        return self.cursor.rowcount > 0
+        
+    def _pragma_value(self, name):
+        """读取单值 PRAGMA"""
+        return _pragma_value(self.cursor, name)
+        
+    def incremental_vacuum(self, max_pages=VACUUM_STEP_PAGES):
+        """回收最多 max_pages 个空闲页，返回实际回收的页数（需启用增量 auto_vacuum）"""
+        return incremental_vacuum(self.conn, max_pages)
+        
+    def run_maintenance(self, max_pages=VACUUM_STEP_PAGES, force=False):
+        """在当前连接上执行一轮小步维护，见模块级 run_maintenance"""
+        return run_maintenance(self.conn, max_pages, force)
+        
+    def enable_incremental_vacuum(self):
+        """将旧数据库转换为增量 auto_vacuum 模式（需一次完整 VACUUM），返回回收的页数"""
+        if self._pragma_value("auto_vacuum") == 2:
+            return 0
+        before = self._pragma_value("page_count")
+        self.conn.commit()
+        self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.cursor.execute("VACUUM")
+        return max(before - self._pragma_value("page_count"), 0)
+        
     def close(self):
         """关闭数据库连接"""
+        # 关闭前按需更新查询规划统计信息，开销很小
+        self.cursor.execute("PRAGMA optimize")
         self.conn.close() 
\ No newline at end of file
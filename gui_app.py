@@ -1,14 +1,23 @@
 import sys
 import os
+import time
+import sqlite3
 import getpass
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QPushButton, QLabel, QLineEdit, QTableWidget, QTableWidgetItem, 
                             QMessageBox, QDialog, QFormLayout, QTextEdit, QHeaderView, 
                             QTabWidget, QGridLayout, QGroupBox, QInputDialog, QComboBox,
-                            QSplitter, QFrame)
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QIcon, QFont
-from database import Database
+                            QSplitter, QFrame, QFileDialog, QProgressDialog, QListWidget,
+                            QListWidgetItem, QAbstractItemView, QShortcut)
+from PyQt5.QtCore import Qt, QSize, QThread, QEvent, QTimer, pyqtSignal
+from PyQt5.QtGui import QIcon, QFont, QKeySequence
+from database import Database, read_all_accounts, run_maintenance
+from breach_check import BreachedHashFile, audit_accounts
+from quick_open import FuzzyIndex
+
+# 空闲维护检查间隔（毫秒），以及距最后一次键盘/鼠标操作多久才算空闲（秒）
+MAINTENANCE_INTERVAL_MS = 5 * 60 * 1000
+MAINTENANCE_IDLE_SECONDS = 60
 
 class PasswordDialog(QDialog):
     """主密码输入对话框"""
@@ -74,6 +83,10 @@ class AccountDialog(QDialog):
         self.notes_input.setMaximumHeight(100)
         form_layout.addRow("备注:", self.notes_input)
         
+        self.tags_input = QLineEdit()
+        self.tags_input.setPlaceholderText("多个标签用逗号分隔")
+        form_layout.addRow("标签:", self.tags_input)
+        
         layout.addLayout(form_layout)
         
         # 如果是编辑模式，填充现有数据
@@ -82,6 +95,7 @@ class AccountDialog(QDialog):
             self.username_input.setText(account['username'])
             self.password_input.setText(account['password'])
             self.notes_input.setText(account['notes'] if account['notes'] else "")
+            self.tags_input.setText(", ".join(account.get('tags', [])))
         
         # 按钮
         button_layout = QHBoxLayout()
@@ -109,14 +123,242 @@ class AccountDialog(QDialog):
             'site_name': self.site_input.text(),
             'username': self.username_input.text(),
             'password': self.password_input.text(),
-            'notes': self.notes_input.toPlainText()
+            'notes': self.notes_input.toPlainText(),
+            'tags': [tag for tag in self.tags_input.text().replace("，", ",").split(",") if tag.strip()]
         }
 
+class AttachmentDialog(QDialog):
+    """账号附件管理对话框"""
+    def __init__(self, db, account_id, site_name, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.account_id = account_id
+        self.setWindowTitle(f"附件 - {site_name}")
+        self.setMinimumWidth(500)
+        
+        layout = QVBoxLayout()
+        
+        self.table = QTableWidget()
+        self.table.setColumnCount(3)
+        self.table.setHorizontalHeaderLabels(["文件名", "大小", "添加时间"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        layout.addWidget(self.table)
+        
+        # 按钮
+        button_layout = QHBoxLayout()
+        self.add_button = QPushButton("添加附件")
+        self.add_button.clicked.connect(self.add_attachment)
+        self.export_button = QPushButton("导出附件")
+        self.export_button.clicked.connect(self.export_attachment)
+        self.delete_button = QPushButton("删除附件")
+        self.delete_button.clicked.connect(self.delete_attachment)
+        self.close_button = QPushButton("关闭")
+        self.close_button.clicked.connect(self.accept)
+        
+        button_layout.addWidget(self.add_button)
+        button_layout.addWidget(self.export_button)
+        button_layout.addWidget(self.delete_button)
+        button_layout.addStretch()
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+        self.load_attachments()
+        
+    def load_attachments(self):
+        """加载附件列表"""
+        self.table.setRowCount(0)
+        for attachment in self.db.get_attachments(self.account_id):
+            row_position = self.table.rowCount()
+            self.table.insertRow(row_position)
+            name_item = QTableWidgetItem(attachment['filename'])
+            name_item.setData(Qt.UserRole, attachment['id'])
+            self.table.setItem(row_position, 0, name_item)
+            self.table.setItem(row_position, 1, QTableWidgetItem(f"{attachment['size']:,} 字节"))
+            self.table.setItem(row_position, 2, QTableWidgetItem(str(attachment['created_at'])))
+            
+    def selected_attachment(self):
+        """返回选中附件的ID和文件名"""
+        selected_rows = self.table.selectedItems()
+        if not selected_rows:
+            QMessageBox.information(self, "提示", "请先选择一个附件")
+            return None, None
+        item = self.table.item(selected_rows[0].row(), 0)
+        return item.data(Qt.UserRole), item.text()
+        
+    def add_attachment(self):
+        path, _ = QFileDialog.getOpenFileName(self, "选择附件")
+        if not path:
+            return
+        try:
+            with open(path, 'rb') as f:
+                self.db.add_attachment(self.account_id, os.path.basename(path), f)
+            self.load_attachments()
+        except Exception as e:
+            QMessageBox.warning(self, "警告", f"添加附件失败: {str(e)}")
+            
+    def export_attachment(self):
+        attachment_id, filename = self.selected_attachment()
+        if attachment_id is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出附件", filename)
+        if not path:
+            return
+        try:
+            with open(path, 'wb') as f:
+                self.db.export_attachment(attachment_id, f)
+        except Exception as e:
+            QMessageBox.warning(self, "警告", f"导出附件失败: {str(e)}")
+            
+    def delete_attachment(self):
+        attachment_id, filename = self.selected_attachment()
+        if attachment_id is None:
+            return
+        reply = QMessageBox.question(
+            self,
+            "确认删除",
+            f"确定要删除附件 '{filename}' 吗？\n此操作不可撤销！",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            try:
+                self.db.delete_attachment(attachment_id)
+                self.load_attachments()
+            except Exception as e:
+                QMessageBox.warning(self, "警告", f"删除附件失败: {str(e)}")
+
+class QuickOpenDialog(QDialog):
+    """快速打开面板：在内存索引中模糊搜索账号，不访问数据库"""
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.setWindowTitle("快速打开")
+        self.setMinimumWidth(450)
+        
+        layout = QVBoxLayout()
+        
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("输入网站名称、用户名或缩写...")
+        self.query_input.textChanged.connect(self.update_results)
+        self.query_input.returnPressed.connect(self.accept)
+        layout.addWidget(self.query_input)
+        
+        self.result_list = QListWidget()
+        self.result_list.itemActivated.connect(self.accept)
+        layout.addWidget(self.result_list)
+        
+        self.setLayout(layout)
+        self.query_input.installEventFilter(self)
+        
+    def eventFilter(self, obj, event):
+        """在输入框中用上下键切换结果"""
+        if obj is self.query_input and event.type() == QEvent.KeyPress and event.key() in (Qt.Key_Up, Qt.Key_Down):
+            row = self.result_list.currentRow() + (1 if event.key() == Qt.Key_Down else -1)
+            if 0 <= row < self.result_list.count():
+                self.result_list.setCurrentRow(row)
+            return True
+        return super().eventFilter(obj, event)
+        
+    def update_results(self, text):
+        """刷新匹配结果"""
+        self.result_list.clear()
+        for match in self.index.search(text, 20):
+            item = QListWidgetItem(f"{match['site_name']}  —  {match['username']}")
+            item.setData(Qt.UserRole, match['id'])
+            self.result_list.addItem(item)
+        if self.result_list.count():
+            self.result_list.setCurrentRow(0)
+            
+    def selected_account_id(self):
+        item = self.result_list.currentItem()
+        return item.data(Qt.UserRole) if item else None
+
+class BreachCheckWorker(QThread):
+    """后台检查密码是否出现在离线泄露列表中"""
+    loaded = pyqtSignal(int)
+    progress = pyqtSignal(int, int)
+    result = pyqtSignal(list)
+    error = pyqtSignal(str)
+    
+    def __init__(self, db_file, master_key, hash_path, parent=None):
+        super().__init__(parent)
+        self.db_file = db_file
+        self.master_key = master_key
+        self.hash_path = hash_path
+        
+    def run(self):
+        try:
+            # 解密整个密码库开销较大，在后台线程用独立的数据库连接完成
+            conn = sqlite3.connect(self.db_file)
+            try:
+                accounts = read_all_accounts(conn, self.master_key)
+            finally:
+                conn.close()
+            self.loaded.emit(len(accounts))
+            hash_file = BreachedHashFile(self.hash_path)
+            try:
+                breached = audit_accounts(accounts, hash_file, self.progress.emit)
+            finally:
+                hash_file.close()
+            self.result.emit(breached)
+        except Exception as e:
+            self.error.emit(str(e))
+
+class QuickIndexWorker(QThread):
+    """后台建立快速打开索引，大的密码库建索引需要数秒"""
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    
+    def __init__(self, accounts, parent=None):
+        super().__init__(parent)
+        self.accounts = accounts
+        
+    def run(self):
+        try:
+            index = FuzzyIndex()
+            index.build(self.accounts)
+            self.result.emit(index)
+        except Exception as e:
+            self.error.emit(str(e))
+
+class MaintenanceWorker(QThread):
+    """后台执行一轮数据库维护，使用独立的数据库连接"""
+    result = pyqtSignal(dict)
+    error = pyqtSignal(str)
+    
+    def __init__(self, db_file, parent=None):
+        super().__init__(parent)
+        self.db_file = db_file
+        
+    def run(self):
+        try:
+            # sqlite3 连接不能跨线程使用，在后台线程中单独打开
+            conn = sqlite3.connect(self.db_file)
+            try:
+                report = run_maintenance(conn)
+            finally:
+                conn.close()
+            self.result.emit(report)
+        except Exception as e:
+            self.error.emit(str(e))
+
 class AccountManagerApp(QMainWindow):
     """主应用窗口"""
     def __init__(self):
         super().__init__()
         self.db = None
+        self.breach_worker = None
+        self.maintenance_worker = None
+        self.index_worker = None
+        self.pending_index_changes = []
+        self.last_input_time = time.monotonic()
+        self.quick_index = FuzzyIndex()
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.timeout.connect(self.run_maintenance)
+        # 记录最后一次键盘/鼠标操作，用于判断是否空闲
+        QApplication.instance().installEventFilter(self)
         self.initUI()
         self.login()
         
@@ -147,6 +389,19 @@ class AccountManagerApp(QMainWindow):
         self.delete_btn.clicked.connect(self.delete_account)
         toolbar_layout.addWidget(self.delete_btn)
         
+        self.attachment_btn = QPushButton("附件")
+        self.attachment_btn.clicked.connect(self.manage_attachments)
+        toolbar_layout.addWidget(self.attachment_btn)
+        
+        self.quick_open_btn = QPushButton("快速打开")
+        self.quick_open_btn.clicked.connect(self.quick_open)
+        toolbar_layout.addWidget(self.quick_open_btn)
+        QShortcut(QKeySequence("Ctrl+P"), self, activated=self.quick_open)
+        
+        self.breach_btn = QPushButton("泄露检查")
+        self.breach_btn.clicked.connect(self.check_breached_passwords)
+        toolbar_layout.addWidget(self.breach_btn)
+        
         toolbar_layout.addStretch()
         
         self.search_input = QLineEdit()
@@ -160,6 +415,19 @@ class AccountManagerApp(QMainWindow):
         
         main_layout.addLayout(toolbar_layout)
         
+        splitter = QSplitter(Qt.Horizontal)
+        
+        # 标签侧边栏：多选时显示同时包含所有选中标签的账号
+        tag_panel = QWidget()
+        tag_layout = QVBoxLayout(tag_panel)
+        tag_layout.setContentsMargins(0, 0, 0, 0)
+        tag_layout.addWidget(QLabel("标签"))
+        self.tag_list = QListWidget()
+        self.tag_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tag_list.itemSelectionChanged.connect(self.search_accounts)
+        tag_layout.addWidget(self.tag_list)
+        splitter.addWidget(tag_panel)
+        
         # 创建表格
         self.table = QTableWidget()
         self.table.setColumnCount(5)
@@ -167,7 +435,11 @@ class AccountManagerApp(QMainWindow):
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setSelectionBehavior(QTableWidget.SelectRows)
         self.table.doubleClicked.connect(self.view_account_details)
-        main_layout.addWidget(self.table)
+        splitter.addWidget(self.table)
+        
+        splitter.setStretchFactor(1, 1)
+        splitter.setSizes([160, 640])
+        main_layout.addWidget(splitter)
         
         # 状态栏
         self.statusBar().showMessage("准备就绪")
@@ -179,7 +451,9 @@ class AccountManagerApp(QMainWindow):
             master_password = dialog.get_password()
             try:
                 self.db = Database(master_password)
+                self.build_quick_index()
                 self.load_accounts()
+                self.maintenance_timer.start(MAINTENANCE_INTERVAL_MS)
                 self.statusBar().showMessage("登录成功")
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"登录失败: {str(e)}")
@@ -190,7 +464,10 @@ class AccountManagerApp(QMainWindow):
     def load_accounts(self, search_keyword=""):
         """加载账号列表"""
         try:
-            if search_keyword:
+            selected_tags = self.selected_tags()
+            if selected_tags:
+                accounts = self.db.filter_accounts_by_tags(selected_tags, keyword=search_keyword)
+            elif search_keyword:
                 accounts = self.db.search_accounts(search_keyword)
             else:
                 accounts = self.db.get_all_accounts()
@@ -212,10 +489,28 @@ class AccountManagerApp(QMainWindow):
                 
                 self.table.setItem(row_position, 4, QTableWidgetItem(account['notes'] if account['notes'] else ""))
                 
+            self.load_tags()
             self.statusBar().showMessage(f"已加载 {self.table.rowCount()} 个账号")
         except Exception as e:
             QMessageBox.warning(self, "警告", f"加载账号失败: {str(e)}")
             
+    def load_tags(self):
+        """刷新标签侧边栏（计数由数据库维护，无需统计全表），保留当前选择"""
+        selected = set(self.selected_tags())
+        self.tag_list.blockSignals(True)
+        self.tag_list.clear()
+        for tag in self.db.get_tag_counts():
+            item = QListWidgetItem(f"{tag['name']} ({tag['count']})")
+            item.setData(Qt.UserRole, tag['name'])
+            self.tag_list.addItem(item)
+            if tag['name'] in selected:
+                item.setSelected(True)
+        self.tag_list.blockSignals(False)
+        
+    def selected_tags(self):
+        """返回侧边栏中选中的标签名称"""
+        return [item.data(Qt.UserRole) for item in self.tag_list.selectedItems()]
+            
     def search_accounts(self):
         """搜索账号"""
         keyword = self.search_input.text()
@@ -227,12 +522,14 @@ class AccountManagerApp(QMainWindow):
         if dialog.exec_():
             account_data = dialog.get_account_data()
             try:
-                self.db.add_account(
+                account_id = self.db.add_account(
                     account_data['site_name'],
                     account_data['username'],
                     account_data['password'],
                     account_data['notes']
                 )
+                self.db.set_account_tags(account_id, account_data['tags'])
+                self.update_quick_index('add', account_id, account_data['site_name'], account_data['username'])
                 self.load_accounts()
                 self.statusBar().showMessage("账号添加成功")
             except Exception as e:
@@ -255,7 +552,8 @@ class AccountManagerApp(QMainWindow):
             'site_name': self.table.item(row, 1).text(),
             'username': self.table.item(row, 2).text(),
             'password': self.table.item(row, 3).data(Qt.UserRole),
-            'notes': self.table.item(row, 4).text()
+            'notes': self.table.item(row, 4).text(),
+            'tags': self.db.get_account_tags(account_id)
         }
         
         dialog = AccountDialog(self, account)
@@ -269,6 +567,8 @@ class AccountManagerApp(QMainWindow):
                     new_data['password'],
                     new_data['notes']
                 )
+                self.db.set_account_tags(account_id, new_data['tags'])
+                self.update_quick_index('update', account_id, new_data['site_name'], new_data['username'])
                 self.load_accounts()
                 self.statusBar().showMessage("账号更新成功")
             except Exception as e:
@@ -298,11 +598,146 @@ class AccountManagerApp(QMainWindow):
         if reply == QMessageBox.Yes:
             try:
                 self.db.delete_account(account_id)
+                self.update_quick_index('remove', account_id)
                 self.load_accounts()
                 self.statusBar().showMessage("账号删除成功")
             except Exception as e:
                 QMessageBox.warning(self, "警告", f"删除账号失败: {str(e)}")
                 
+    def manage_attachments(self):
+        """管理选中账号的附件"""
+        selected_rows = self.table.selectedItems()
+        if not selected_rows:
+            QMessageBox.information(self, "提示", "请先选择一个账号")
+            return
+            
+        row = selected_rows[0].row()
+        account_id = int(self.table.item(row, 0).text())
+        site_name = self.table.item(row, 1).text()
+        
+        dialog = AttachmentDialog(self.db, account_id, site_name, self)
+        dialog.exec_()
+        
+    def check_breached_passwords(self):
+        """检查所有密码是否出现在离线泄露密码列表中"""
+        hash_path, _ = QFileDialog.getOpenFileName(self, "选择泄露密码哈希文件", "", "哈希文件 (*.bin);;所有文件 (*)")
+        if not hash_path:
+            return
+            
+        # 账号总数在后台线程解密完成后才知道，此前进度条显示为忙碌状态
+        self.breach_progress = QProgressDialog("正在检查密码...", None, 0, 0, self)
+        self.breach_progress.setWindowTitle("泄露检查")
+        self.breach_progress.setWindowModality(Qt.WindowModal)
+        self.breach_progress.setMinimumDuration(0)
+        
+        self.breach_btn.setEnabled(False)
+        self.breach_worker = BreachCheckWorker(self.db.db_file, self.db.master_key, hash_path, self)
+        self.breach_worker.loaded.connect(self.breach_progress.setMaximum)
+        self.breach_worker.progress.connect(lambda done, total: self.breach_progress.setValue(done))
+        self.breach_worker.result.connect(self.show_breach_result)
+        self.breach_worker.error.connect(self.show_breach_error)
+        self.breach_worker.finished.connect(self.breach_check_finished)
+        self.breach_worker.start()
+        
+    def show_breach_result(self, breached):
+        """显示泄露检查结果"""
+        if not breached:
+            QMessageBox.information(self, "泄露检查", "未发现已泄露的密码")
+            return
+        lines = [f"{account['site_name']} - {account['username']}" for account in breached]
+        QMessageBox.warning(
+            self,
+            "泄露检查",
+            f"以下 {len(breached)} 个账号的密码出现在泄露列表中，建议尽快修改:\n\n" + "\n".join(lines)
+        )
+        
+    def show_breach_error(self, message):
+        QMessageBox.warning(self, "警告", f"泄露检查失败: {message}")
+        
+    def breach_check_finished(self):
+        self.breach_progress.close()
+        self.breach_btn.setEnabled(True)
+        self.breach_worker = None
+        
+    def build_quick_index(self):
+        """解锁后在后台线程建立快速打开索引，之后随增删改增量更新"""
+        # 只读取名称和用户名，不解密密码，在主线程读取很快
+        self.index_worker = QuickIndexWorker(self.db.list_accounts(), self)
+        self.index_worker.result.connect(self.quick_index_ready)
+        self.index_worker.error.connect(
+            lambda message: self.statusBar().showMessage(f"建立快速打开索引失败: {message}")
+        )
+        self.index_worker.finished.connect(self.quick_index_finished)
+        self.index_worker.start()
+        
+    def update_quick_index(self, method, *args):
+        """增量更新快速打开索引；索引建立期间的修改记下来，建好后补上"""
+        getattr(self.quick_index, method)(*args)
+        if self.index_worker:
+            self.pending_index_changes.append((method, args))
+            
+    def quick_index_ready(self, index):
+        for method, args in self.pending_index_changes:
+            getattr(index, method)(*args)
+        self.quick_index = index
+        
+    def quick_index_finished(self):
+        self.pending_index_changes = []
+        self.index_worker = None
+        
+    def quick_open(self):
+        """打开快速搜索面板，选中后显示账号详情"""
+        if not self.db:
+            return
+        if self.index_worker:
+            self.statusBar().showMessage("快速打开索引正在建立，搜索结果可能不完整")
+        dialog = QuickOpenDialog(self.quick_index, self)
+        if dialog.exec_():
+            account_id = dialog.selected_account_id()
+            if account_id is None:
+                return
+            # 只解密选中的这一个账号
+            account = self.db.get_account(account_id)
+            if account:
+                account['tags'] = self.db.get_account_tags(account_id)
+                self.show_account_details(account)
+                
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.Wheel):
+            self.last_input_time = time.monotonic()
+        return super().eventFilter(obj, event)
+        
+    def run_maintenance(self):
+        """空闲时在后台线程执行一轮小步数据库维护"""
+        # 最近有操作、有对话框打开或后台任务运行时跳过，留到下次
+        if (not self.db or self.maintenance_worker or self.breach_worker or self.index_worker
+                or QApplication.activeModalWidget()):
+            return
+        if time.monotonic() - self.last_input_time < MAINTENANCE_IDLE_SECONDS:
+            return
+        self.maintenance_worker = MaintenanceWorker(self.db.db_file, self)
+        self.maintenance_worker.result.connect(self.show_maintenance_result)
+        self.maintenance_worker.error.connect(
+            lambda message: self.statusBar().showMessage(f"数据库维护失败: {message}")
+        )
+        self.maintenance_worker.finished.connect(self.maintenance_finished)
+        self.maintenance_worker.start()
+        
+    def maintenance_finished(self):
+        self.maintenance_worker = None
+        
+    def show_maintenance_result(self, report):
+        """显示维护结果，只在有问题或回收了空间时提示"""
+        if report['integrity'] not in (None, "ok"):
+            QMessageBox.warning(self, "警告", f"数据库完整性检查发现问题，请尽快备份数据库文件:\n{report['integrity']}")
+        elif report['reclaimed_pages']:
+            reclaimed_kb = report['reclaimed_pages'] * report['page_size'] // 1024
+            self.statusBar().showMessage(
+                f"数据库维护：回收 {reclaimed_kb} KB，耗时 {report['elapsed'] * 1000:.0f} 毫秒"
+            )
+        elif report.get('note') and report['freelist_pages']:
+            self.statusBar().showMessage(f"数据库维护：{report['note']}")
+            
     def view_account_details(self, index):
         """查看账号详情"""
         row = index.row()
@@ -314,22 +749,33 @@ class AccountManagerApp(QMainWindow):
             'site_name': self.table.item(row, 1).text(),
             'username': self.table.item(row, 2).text(),
             'password': self.table.item(row, 3).data(Qt.UserRole),
-            'notes': self.table.item(row, 4).text()
+            'notes': self.table.item(row, 4).text(),
+            'tags': self.db.get_account_tags(account_id)
         }
+        self.show_account_details(account)
         
-        # 显示详情对话框
+    def show_account_details(self, account):
+        """显示只读的账号详情对话框"""
         dialog = AccountDialog(self, account)
         dialog.setWindowTitle("账号详情")
         dialog.site_input.setReadOnly(True)
         dialog.username_input.setReadOnly(True)
         dialog.password_input.setReadOnly(True)
         dialog.notes_input.setReadOnly(True)
+        dialog.tags_input.setReadOnly(True)
         dialog.ok_button.setText("关闭")
         dialog.cancel_button.hide()
         dialog.exec_()
         
     def closeEvent(self, event):
         """关闭窗口时的处理"""
+        self.maintenance_timer.stop()
+        if self.breach_worker:
+            self.breach_worker.wait()
+        if self.maintenance_worker:
+            self.maintenance_worker.wait()
+        if self.index_worker:
+            self.index_worker.wait()
         if self.db:
             self.db.close()
         event.accept()
@@ -1,8 +1,14 @@
 import os
+import sys
+import json
 import getpass
+import argparse
 import time
 from database import Database
 
+# 非交互模式下从该环境变量读取主密码
+MASTER_PASSWORD_ENV = "ACCOUNT_MANAGER_PASSWORD"
+
 class AccountManager:
     def __init__(self):
         """初始化账号管理器"""
@@ -210,6 +216,163 @@ class AccountManager:
         self._clear_screen()
         print("感谢使用账号密码管理系统，再见！")
         
+class CommandLine:
+    """非交互式命令行：解锁一次，批量处理，以JSON Lines输出"""
+    def __init__(self, db, stdin=None, stdout=None):
+        self.db = db
+        self.stdin = stdin or sys.stdin
+        self.stdout = stdout or sys.stdout
+        self.errors = 0
+        
+    def run(self, args):
+        """执行子命令，全部成功时返回0"""
+        handler = getattr(self, "cmd_" + args.command)
+        handler(args)
+        self.stdout.flush()
+        return 1 if self.errors else 0
+        
+    def cmd_add(self, args):
+        """添加单个账号，密码未通过参数提供时从标准输入读取一行"""
+        password = args.password
+        if password is None:
+            password = self.stdin.readline().rstrip("\n")
+        account_id = self.db.add_account(args.site, args.username, password, args.notes or "")
+        self._emit({'id': account_id})
+        
+    def cmd_get(self, args):
+        """按ID获取账号，未提供ID时从标准输入逐行读取"""
+        for value in args.ids or self._stdin_lines():
+            if not str(value).isdigit():
+                self._error(f"无效的ID: {value}", id=value)
+                continue
+            account = self.db.get_account(int(value))
+            if account:
+                self._emit(account)
+            else:
+                self._error(f"未找到ID为 {value} 的账号", id=int(value))
+                
+    def cmd_search(self, args):
+        """搜索账号，未提供关键词时从标准输入逐行读取"""
+        for keyword in args.keywords or self._stdin_lines():
+            for account in self.db.search_accounts(keyword):
+                account['query'] = keyword
+                self._emit(account)
+                
+    def cmd_list(self, args):
+        """列出所有账号（不含密码）"""
+        for account in self.db.list_accounts():
+            self._emit(account)
+            
+    def cmd_import(self, args):
+        """从标准输入读取JSON Lines账号记录并在单个事务中导入"""
+        accounts = []
+        for line_number, line in enumerate(self._stdin_lines(), 1):
+            try:
+                accounts.append(self._parse_account(json.loads(line)))
+            except (ValueError, KeyError, TypeError) as e:
+                self._error(f"第 {line_number} 行无效: {e}", line=line_number)
+        for account_id in self.db.import_accounts(accounts):
+            self._emit({'id': account_id})
+            
+    def _parse_account(self, record):
+        """校验导入的账号记录，字段缺失或类型不对时抛出异常"""
+        if not isinstance(record, dict):
+            raise TypeError("记录必须是JSON对象")
+        account = {}
+        for field in ('site_name', 'username', 'password'):
+            value = record[field]
+            if not isinstance(value, str):
+                raise TypeError(f"字段 {field} 必须是字符串")
+            account[field] = value
+        if not account['site_name'] or not account['username']:
+            raise ValueError("网站/服务名称和用户名/账号不能为空")
+        notes = record.get('notes')
+        if notes is not None and not isinstance(notes, str):
+            raise TypeError("字段 notes 必须是字符串")
+        account['notes'] = notes or ""
+        return account
+        
+    def cmd_export(self, args):
+        """导出所有账号（含解密后的密码）"""
+        for account in self.db.get_all_accounts():
+            self._emit(account)
+            
+    def cmd_maintenance(self, args):
+        """执行数据库维护并输出报告"""
+        if args.convert:
+            self._emit({'converted_reclaimed_pages': self.db.enable_incremental_vacuum()})
+        report = self.db.run_maintenance(max_pages=args.pages, force=True)
+        self._emit(report)
+        if report['integrity'] != "ok":
+            self.errors += 1
+            
+    def _stdin_lines(self):
+        """逐行读取标准输入，跳过空行"""
+        for line in self.stdin:
+            line = line.strip()
+            if line:
+                yield line
+                
+    def _emit(self, record):
+        self.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        
+    def _error(self, message, **fields):
+        self.errors += 1
+        record = {'error': message}
+        record.update(fields)
+        self._emit(record)
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="账号密码管理系统（不带子命令时进入交互模式）")
+    parser.add_argument("--db", help="数据库文件路径，默认为 ~/AccountManager/accounts.db")
+    parser.add_argument("--password-stdin", action="store_true",
+                        help=f"从标准输入第一行读取主密码（否则读取环境变量 {MASTER_PASSWORD_ENV}）")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    add_parser = subparsers.add_parser("add", help="添加账号")
+    add_parser.add_argument("--site", required=True, help="网站/服务名称")
+    add_parser.add_argument("--username", required=True, help="用户名/账号")
+    add_parser.add_argument("--password", help="密码，省略时从标准输入读取一行")
+    add_parser.add_argument("--notes", help="备注")
+    
+    get_parser = subparsers.add_parser("get", help="按ID获取账号")
+    get_parser.add_argument("ids", nargs="*", help="账号ID，省略时从标准输入逐行读取")
+    
+    search_parser = subparsers.add_parser("search", help="搜索账号")
+    search_parser.add_argument("keywords", nargs="*", help="关键词，省略时从标准输入逐行读取")
+    
+    subparsers.add_parser("list", help="列出所有账号（不含密码）")
+    subparsers.add_parser("import", help="从标准输入导入JSON Lines账号记录")
+    subparsers.add_parser("export", help="以JSON Lines导出所有账号（含密码）")
+    
+    maintenance_parser = subparsers.add_parser("maintenance", help="回收空闲页、更新统计信息并检查完整性")
+    maintenance_parser.add_argument("--pages", type=int, default=1000, help="本次最多回收的空闲页数")
+    maintenance_parser.add_argument("--convert", action="store_true",
+                                    help="将旧数据库转换为增量回收模式（执行一次完整VACUUM）")
+    return parser
+
+def read_master_password(args):
+    """非交互模式下获取主密码：标准输入、环境变量，最后才提示输入"""
+    if args.password_stdin:
+        return sys.stdin.readline().rstrip("\n")
+    if os.environ.get(MASTER_PASSWORD_ENV):
+        return os.environ[MASTER_PASSWORD_ENV]
+    return getpass.getpass("请输入主密码: ")
+
+def main(argv=None):
+    """程序入口"""
+    args = build_parser().parse_args(argv)
+    if not args.command:
+        manager = AccountManager()
+        manager.start()
+        return 0
+        
+    db = Database(read_master_password(args), args.db)
+    try:
+        return CommandLine(db).run(args)
+    finally:
+        db.close()
+        
 if __name__ == "__main__":
-    manager = AccountManager()
-    manager.start() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
@@ -0,0 +1,330 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import chain
+from operator import itemgetter
+
+# 容错/子序列匹配最多参与评分的候选数
+MAX_TYPO_CANDIDATES = 300
+# 容错匹配时计数的倒排表总长度上限，超出后跳过较常见的三字母组（如邮箱域名）
+TYPO_SCAN_LIMIT = 10000
+
+# 得分分级（见 FuzzyIndex._score）
+SCORE_SITE_WORD_SUBSTRING = 750
+SCORE_SITE_SUBSTRING = 700
+SCORE_USER_HEAD = 550
+SCORE_USER_WORD_SUBSTRING = 525
+SCORE_USER_SUBSTRING = 500
+SCORE_SUBSEQUENCE_MAX = 399
+
+_EMPTY = frozenset()
+
+
+def _word_starts(text):
+    """返回单词起始位置：字符串开头、非字母数字之后、小写到大写的转折处"""
+    starts = []
+    for i, ch in enumerate(text):
+        if not ch.isalnum():
+            continue
+        if i == 0 or not text[i - 1].isalnum() or (ch.isupper() and text[i - 1].islower()):
+            starts.append(i)
+    return starts
+
+
+def _trigrams(text, padded=True):
+    """生成三字母组；padded 为 True 时加边界填充，容错匹配时可体现开头和结尾"""
+    if padded:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _prefixes(words):
+    """生成各单词长度为1~3的前缀"""
+    keys = set()
+    for word in words:
+        keys.update((word[:1], word[:2], word[:3]))
+    keys.discard("")
+    return keys
+
+
+class _Entry:
+    """索引中的一条账号记录"""
+    __slots__ = ('account_id', 'site_name', 'username', 'site', 'user',
+                 'site_starts', 'user_starts', 'initials')
+
+    def __init__(self, account_id, site_name, username):
+        self.account_id = account_id
+        self.site_name = site_name
+        self.username = username
+        self.site = site_name.lower()
+        self.user = username.lower()
+        self.site_starts = frozenset(_word_starts(site_name))
+        self.user_starts = frozenset(_word_starts(username))
+        self.initials = "".join(self.site[i] for i in sorted(self.site_starts))
+
+
+class FuzzyIndex:
+    """账号名称/用户名的内存模糊索引：三字母组倒排 + 前缀/首字母倒排 + 子序列评分
+
+    只使用网站名称和用户名，不访问数据库也不解密密码。
+    """
+    def __init__(self):
+        self.entries = {}
+        self.site_grams = {}
+        self.user_grams = {}
+        self.site_heads = {}
+        self.site_initials = {}
+        self.site_prefixes = {}
+        self.user_heads = {}
+        self.user_prefixes = {}
+        # 字符对 -> 包含它的三字母组，两个字符的查询据此找子串候选
+        self.site_pairs = defaultdict(set)
+        self.user_pairs = defaultdict(set)
+
+    def build(self, accounts):
+        """从账号列表（含 id、site_name、username）重建索引"""
+        self.__init__()
+        for account in accounts:
+            self.add(account['id'], account['site_name'], account['username'])
+
+    def _postings(self, entry):
+        """返回 (倒排表, 字符对索引, 键集合) 列表"""
+        site, user = entry.site, entry.user
+        return [
+            (self.site_grams, self.site_pairs, _trigrams(site)),
+            (self.user_grams, self.user_pairs, _trigrams(user) if user else ()),
+            # 网站名称/用户名开头、首字母缩写（"gh" -> "GitHub"）和各单词的1~3字符前缀
+            (self.site_heads, None, _prefixes([site])),
+            (self.site_initials, None, _prefixes([entry.initials])),
+            (self.site_prefixes, None, _prefixes([site[i:i + 3] for i in entry.site_starts])),
+            (self.user_heads, None, _prefixes([user])),
+            (self.user_prefixes, None, _prefixes([user[i:i + 3] for i in entry.user_starts])),
+        ]
+
+    def add(self, account_id, site_name, username):
+        """添加一条记录，已存在时替换"""
+        if account_id in self.entries:
+            self.remove(account_id)
+        entry = _Entry(account_id, site_name or "", username or "")
+        self.entries[account_id] = entry
+        for postings, pairs, keys in self._postings(entry):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is None:
+                    ids = postings[key] = set()
+                    if pairs is not None:
+                        pairs[key[:2]].add(key)
+                        pairs[key[1:]].add(key)
+                ids.add(account_id)
+
+    def update(self, account_id, site_name, username):
+        """更新一条记录"""
+        self.add(account_id, site_name, username)
+
+    def remove(self, account_id):
+        """删除一条记录"""
+        entry = self.entries.pop(account_id, None)
+        if entry is None:
+            return
+        for postings, pairs, keys in self._postings(entry):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(account_id)
+                    if not ids:
+                        del postings[key]
+                        if pairs is not None:
+                            for pair in (key[:2], key[1:]):
+                                pairs[pair].discard(key)
+                                if not pairs[pair]:
+                                    del pairs[pair]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=10):
+        """返回按相关度排序的前 limit 条匹配 {'id', 'site_name', 'username', 'score'}
+
+        候选按得分上限从高到低分级取出，每条都精确评分；某一级取满 limit 条最高分，
+        或前 limit 条的最低分不低于后续各级可能达到的最高分时即停止，
+        大的候选集合只按需逐条检查，不会整体评分。
+        单个字符的查询只匹配单词开头和首字母缩写；子序列和拼写错误只在与查询
+        共享三字母组最多的 MAX_TYPO_CANDIDATES 条记录中查找。
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        scores = {}
+        for candidates, score, top, bound in self._candidate_tiers(query, limit, scores):
+            filled = 0
+            for account_id in candidates:
+                if account_id in scores:
+                    continue
+                value = score(self.entries[account_id])
+                if value is None:
+                    continue
+                scores[account_id] = value
+                # 该级得分不会超过 top，后续各级也不会，取满 limit 条即可结束
+                if top is not None and value >= top:
+                    filled += 1
+                    if filled >= limit:
+                        break
+            if filled >= limit:
+                break
+            if len(scores) >= limit and heapq.nlargest(limit, scores.values())[-1] >= bound:
+                break
+
+        return [
+            {
+                'id': account_id,
+                'site_name': self.entries[account_id].site_name,
+                'username': self.entries[account_id].username,
+                'score': score
+            }
+            for account_id, score in heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        ]
+
+    def _substring_candidates(self, gram_postings, pairs, query):
+        """返回包含查询子串的记录的一个超集，按需逐条生成"""
+        if len(query) >= 3:
+            # 包含子串的记录一定出现在查询每个（不加填充的）三字母组的倒排表中，取最短的一个
+            return min((gram_postings.get(gram, _EMPTY) for gram in _trigrams(query, padded=False)), key=len)
+        # 两个字符：依次取包含该字符对的三字母组的倒排表
+        return chain.from_iterable(gram_postings[gram] for gram in pairs.get(query, _EMPTY))
+
+    def _candidate_tiers(self, query, limit, scores):
+        """按得分上限从高到低生成 (候选ID, 评分函数, 本级最高分, 之后各级的最高分)
+
+        评分函数对不属于本级的候选返回None，留给后续各级。
+        """
+        entries = self.entries
+        key = query[:3]
+        exact = lambda entry: self._score(query, entry)
+        site_length = lambda account_id: len(entries[account_id].site)
+        site_hits = self._substring_candidates(self.site_grams, self.site_pairs, query) if len(query) > 1 else _EMPTY
+        user_hits = self._substring_candidates(self.user_grams, self.user_pairs, query) if len(query) > 1 else _EMPTY
+
+        def narrow(postings, hits):
+            # 超过3个字符时前缀倒排表只是超集，与子串候选取较小者
+            ids = postings.get(key, _EMPTY)
+            if len(query) > 3 and isinstance(hits, (set, frozenset)) and len(hits) < len(ids):
+                return hits
+            return ids
+
+        def matching(check):
+            return lambda entry: exact(entry) if check(entry) else None
+
+        # 网站名称以查询开头：得分只取决于长度，取最短的 limit 条
+        heads = [i for i in narrow(self.site_heads, site_hits) if entries[i].site.startswith(query)]
+        yield heapq.nsmallest(limit, heads, key=site_length), exact, None, 800
+
+        # 首字母缩写
+        if len(query) > 1:
+            initials = [
+                i for i in self.site_initials.get(key, _EMPTY)
+                if i not in scores and entries[i].initials.startswith(query)
+            ]
+            yield heapq.nsmallest(limit, initials, key=site_length), exact, None, SCORE_SITE_WORD_SUBSTRING
+
+        # 网站名称中某个单词以查询开头
+        site_word = lambda entry: any(entry.site.startswith(query, i) for i in entry.site_starts)
+        yield (narrow(self.site_prefixes, site_hits), matching(site_word),
+               SCORE_SITE_WORD_SUBSTRING, SCORE_SITE_SUBSTRING)
+        # 网站名称子串
+        yield site_hits, matching(lambda entry: query in entry.site), SCORE_SITE_SUBSTRING, SCORE_USER_HEAD
+        # 用户名开头
+        yield (narrow(self.user_heads, user_hits), matching(lambda entry: entry.user.startswith(query)),
+               SCORE_USER_HEAD, SCORE_USER_WORD_SUBSTRING)
+        # 用户名中某个单词（如邮箱域名）以查询开头
+        user_word = lambda entry: any(entry.user.startswith(query, i) for i in entry.user_starts)
+        yield (narrow(self.user_prefixes, user_hits), matching(user_word),
+               SCORE_USER_WORD_SUBSTRING, SCORE_USER_SUBSTRING)
+        # 用户名子串
+        yield user_hits, matching(lambda entry: query in entry.user), SCORE_USER_SUBSTRING, SCORE_SUBSEQUENCE_MAX
+
+        if len(query) >= 3:
+            yield self._typo_tier(query)
+
+    def _typo_tier(self, query):
+        """子序列与拼写错误：在共享三字母组最多的记录中评分"""
+        grams = _trigrams(query)
+        # 至少共享一半三字母组才算拼写错误；这样的记录必然出现在最少见的 n-need+1 个倒排表之一中
+        need = (len(grams) + 1) // 2
+        field_postings = []
+        candidates = set()
+        for gram_postings in (self.site_grams, self.user_grams):
+            postings = sorted((gram_postings.get(gram, _EMPTY) for gram in grams), key=len)
+            field_postings.append(postings)
+            counts = Counter()
+            scanned = 0
+            for ids in postings[:len(grams) - need + 1]:
+                scanned += len(ids)
+                if scanned > TYPO_SCAN_LIMIT:
+                    break
+                counts.update(ids)
+            candidates.update(
+                account_id for account_id, _ in heapq.nlargest(MAX_TYPO_CANDIDATES, counts.items(), key=itemgetter(1))
+            )
+
+        def score(entry):
+            value = self._score(query, entry)
+            if value is None:
+                shared = max(
+                    sum(1 for ids in postings if entry.account_id in ids) for postings in field_postings
+                )
+                value = self._typo_score(shared, len(grams)) or None
+            return value
+
+        return candidates, score, None, 0
+
+    def _score(self, query, entry):
+        """计算匹配得分：网站名称优先于用户名，精确/前缀 > 缩写 > 子串 > 子序列；均不匹配时返回None"""
+        site = entry.site
+        if site == query:
+            return 1000
+        if site.startswith(query):
+            return 900 - min(len(site), 99)
+        if len(query) > 1 and entry.initials.startswith(query):
+            return 800 - min(len(site), 99)
+        if query in site:
+            if any(site.startswith(query, i) for i in entry.site_starts):
+                return SCORE_SITE_WORD_SUBSTRING
+            return SCORE_SITE_SUBSTRING
+        user = entry.user
+        if query in user:
+            if user.startswith(query):
+                return SCORE_USER_HEAD
+            if any(user.startswith(query, i) for i in entry.user_starts):
+                return SCORE_USER_WORD_SUBSTRING
+            return SCORE_USER_SUBSTRING
+
+        subsequence = self._subsequence_score(query, site, entry.site_starts)
+        if subsequence is not None:
+            return 300 + subsequence
+        subsequence = self._subsequence_score(query, user, entry.user_starts)
+        if subsequence is not None:
+            return 200 + subsequence
+        return None
+
+    def _typo_score(self, shared_grams, query_gram_count):
+        """拼写错误：按共享三字母组比例打分，至少需要一半相同"""
+        if query_gram_count and shared_grams * 2 >= query_gram_count:
+            return 100 * min(shared_grams, query_gram_count) // query_gram_count
+        return 0
+
+    def _subsequence_score(self, query, text, starts):
+        """查询字符按顺序出现在文本中时返回得分（单词起始和连续命中加分，间隔扣分），否则返回None"""
+        score = 0
+        position = -1
+        for ch in query:
+            found = text.find(ch, position + 1)
+            if found < 0:
+                return None
+            if found in starts:
+                score += 10
+            elif found == position + 1:
+                score += 5
+            else:
+                score -= min(found - position - 1, 5)
+            position = found
+        return max(min(score, 99), -99)
@@ -0,0 +1,121 @@
+import os
+import sys
+import getpass
+from database import Database
+
+def _versions(rows, tombstones):
+    """返回 {uuid: 版本}，用于判断两端的记录是否已经一致"""
+    versions = {row['uuid']: ('row', row['updated_at']) for row in rows}
+    versions.update((t['uuid'], ('deleted',)) for t in tombstones)
+    return versions
+
+def _merge_records(changes, extra):
+    """将额外记录合并进变更集，按 uuid 去重"""
+    rows, tombstones = changes
+    extra_rows, extra_tombstones = extra
+    extra_uuids = {item['uuid'] for item in extra_rows + extra_tombstones}
+    rows = [row for row in rows if row['uuid'] not in extra_uuids] + extra_rows
+    tombstones = [t for t in tombstones if t['uuid'] not in extra_uuids] + extra_tombstones
+    return rows, tombstones
+
+def sync_databases(local_db, remote_db, on_conflict="lww"):
+    """在两个数据库之间双向同步自上次同步点以来的变更
+
+    on_conflict 为 "lww" 时，双方都修改过的记录以最后修改时间为准；
+    为 "report" 时，冲突记录不做同步，仅在结果中列出，并在之后的同步中继续比较，
+    直到两端一致或以 "lww" 模式同步为止。
+    """
+    local_id = local_db.get_vault_id()
+    remote_id = remote_db.get_vault_id()
+
+    # 直接复制文件得到的数据库标识相同，会共用同步点而漏掉变更，为对端重新生成标识
+    rekeyed = local_id == remote_id
+    if rekeyed:
+        remote_id = remote_db.reset_vault_id()
+
+    # 只取上次同步点之后的变更
+    local_changes = local_db.get_changes_since(local_db.get_sync_point(remote_id))
+    remote_changes = remote_db.get_changes_since(remote_db.get_sync_point(local_id))
+
+    # 未解决的冲突每次都取两端的当前版本重新比较
+    pending = set(local_db.get_pending_conflicts(remote_id)) | set(remote_db.get_pending_conflicts(local_id))
+    if pending:
+        local_changes = _merge_records(local_changes, local_db.get_sync_records(pending))
+        remote_changes = _merge_records(remote_changes, remote_db.get_sync_records(pending))
+
+    # 双方都有变更且版本不同的记录即为冲突
+    local_versions = _versions(*local_changes)
+    remote_versions = _versions(*remote_changes)
+    conflicts = sorted(
+        uuid for uuid in local_versions.keys() & remote_versions.keys()
+        if local_versions[uuid] != remote_versions[uuid]
+    )
+
+    local_rows, local_tombstones = local_changes
+    remote_rows, remote_tombstones = remote_changes
+    if on_conflict == "report" and conflicts:
+        skipped = set(conflicts)
+        local_rows = [row for row in local_rows if row['uuid'] not in skipped]
+        local_tombstones = [t for t in local_tombstones if t['uuid'] not in skipped]
+        remote_rows = [row for row in remote_rows if row['uuid'] not in skipped]
+        remote_tombstones = [t for t in remote_tombstones if t['uuid'] not in skipped]
+
+    sent = remote_db.apply_changes(local_rows, local_tombstones)
+    received = local_db.apply_changes(remote_rows, remote_tombstones)
+
+    # 同步点取应用对端变更之后的序号，避免下次把刚收到的记录再发回去；
+    # 报告模式下跳过的冲突单独记录，不影响其他记录的同步点
+    unresolved = conflicts if on_conflict == "report" else []
+    local_db.set_pending_conflicts(remote_id, unresolved)
+    remote_db.set_pending_conflicts(local_id, unresolved)
+    local_db.set_sync_point(remote_id, local_db.get_change_seq())
+    remote_db.set_sync_point(local_id, remote_db.get_change_seq())
+
+    return {
+        'sent': sent,
+        'received': received,
+        'conflicts': conflicts,
+        'rekeyed': rekeyed
+    }
+
+def main():
+    """命令行入口: python sync_data.py <另一数据库路径> [--report]"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    on_conflict = "report" if "--report" in sys.argv[1:] else "lww"
+    if len(args) != 1:
+        print("用法: python sync_data.py <另一数据库路径> [--report]")
+        return False
+
+    remote_file = args[0]
+    if not os.path.exists(remote_file):
+        print(f"错误: 找不到数据库文件 {remote_file}")
+        return False
+
+    # 两个数据库必须使用相同的主密码，密码以加密形式直接传输
+    master_password = getpass.getpass("请输入主密码: ")
+    local_db = Database(master_password)
+    remote_db = Database(master_password, remote_file)
+    try:
+        result = sync_databases(local_db, remote_db, on_conflict)
+    except Exception as e:
+        print(f"同步时出错: {e}")
+        return False
+    finally:
+        local_db.close()
+        remote_db.close()
+
+    if result['rekeyed']:
+        print(f"提示: {remote_file} 与本地数据库是直接复制的同一文件，已为其生成新的同步标识")
+    print(f"发送 {result['sent']} 条变更，接收 {result['received']} 条变更")
+    if result['conflicts']:
+        action = "未同步" if on_conflict == "report" else "已按最后修改时间处理"
+        print(f"{len(result['conflicts'])} 条记录在两端均被修改（{action}）:")
+        for uuid in result['conflicts']:
+            print(f"  {uuid}")
+    return True
+
+if __name__ == "__main__":
+    if main():
+        print("\n同步完成！")
+    else:
+        print("\n同步失败！")
@@ -0,0 +1,67 @@
+import hashlib
+import pytest
+from breach_check import (BLOOM_HEADER, BLOOM_MAGIC, BloomFilter, BreachedHashFile, _hash_file_fingerprint,
+                          build_bloom_filter, build_hash_file)
+
+
+def _write_list(path, passwords):
+    lines = sorted(hashlib.sha1(p.encode()).hexdigest().upper() + ":1" for p in passwords)
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_stale_bloom_filter_is_not_used(tmp_path):
+    """重新生成哈希文件后，旧的布隆过滤器不能导致漏报"""
+    old_list, new_list = tmp_path / "old.txt", tmp_path / "new.txt"
+    hash_path = str(tmp_path / "hashes.bin")
+    _write_list(old_list, [f"old{i}" for i in range(1000)])
+    _write_list(new_list, [f"new{i}" for i in range(1000)])
+
+    build_hash_file(str(old_list), hash_path)
+    build_bloom_filter(hash_path, hash_path + ".bloom")
+    build_hash_file(str(new_list), hash_path)
+
+    hash_file = BreachedHashFile(hash_path)
+    try:
+        assert all(hash_file.contains_password(f"new{i}") for i in range(1000))
+    finally:
+        hash_file.close()
+
+
+def test_mismatched_bloom_filter_is_rejected(tmp_path):
+    """显式指定的布隆过滤器与哈希文件不匹配时报错"""
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    _write_list(first, ["a", "b"])
+    _write_list(second, ["c", "d"])
+    build_hash_file(str(first), str(tmp_path / "a.bin"))
+    build_hash_file(str(second), str(tmp_path / "b.bin"))
+    build_bloom_filter(str(tmp_path / "a.bin"), str(tmp_path / "a.bloom"))
+
+    with pytest.raises(ValueError):
+        BreachedHashFile(str(tmp_path / "b.bin"), str(tmp_path / "a.bloom"))
+
+    # 由同一文件生成的过滤器照常使用
+    hash_file = BreachedHashFile(str(tmp_path / "a.bin"), str(tmp_path / "a.bloom"))
+    try:
+        assert hash_file.bloom is not None
+        assert hash_file.contains_password("a") and not hash_file.contains_password("c")
+    finally:
+        hash_file.close()
+
+
+def test_corrupt_bloom_header_is_rejected(tmp_path):
+    """位数或哈希函数个数为0的过滤器无效"""
+    text, hash_path = tmp_path / "a.txt", str(tmp_path / "a.bin")
+    _write_list(text, ["a", "b"])
+    build_hash_file(str(text), hash_path)
+    count, fingerprint = _hash_file_fingerprint(hash_path)
+    for num_bits, num_hashes in ((0, 3), (64, 0)):
+        with open(hash_path + ".bloom", "wb") as f:
+            f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, num_bits, num_hashes, count, fingerprint) + b"\xff" * 8)
+        with pytest.raises(ValueError):
+            BloomFilter(hash_path + ".bloom")
+        # 自动检测到的损坏过滤器不使用，查询照常
+        hash_file = BreachedHashFile(hash_path)
+        try:
+            assert hash_file.bloom is None and hash_file.contains_password("a")
+        finally:
+            hash_file.close()
@@ -0,0 +1,143 @@
+import io
+import os
+import sqlite3
+import pytest
+from database import ATTACHMENT_CHUNK_SIZE, Database, run_maintenance
+
+
+def test_maintenance_on_separate_connection(tmp_path):
+    """维护可以在独立连接上执行；旧数据库在转换前报告中带有提示"""
+    db_file = str(tmp_path / "accounts.db")
+    # 模拟旧版本创建的数据库：建表时未启用增量 auto_vacuum
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE legacy (id INTEGER)")
+    conn.close()
+
+    db = Database("master", db_file)
+    ids = [db.add_account(f"Site{i}", "me", "x" * 2000, "n" * 2000) for i in range(200)]
+    for account_id in ids:
+        db.delete_account(account_id)
+
+    conn = sqlite3.connect(db_file)
+    legacy = run_maintenance(conn)
+    assert legacy['reclaimed_pages'] == 0 and legacy['freelist_pages'] > 0
+    assert "--convert" in legacy['note']
+
+    db.enable_incremental_vacuum()
+    db.add_account("GitHub", "me", "x" * 2000, "n" * 2000)
+    db.delete_account(db.list_accounts()[0]['id'])
+    report = run_maintenance(conn, max_pages=1000, force=True)
+    assert 'note' not in report and report['freelist_pages'] == 0
+    assert report['integrity'] == "ok"
+    conn.close()
+    db.close()
+
+
+class _FailingReader:
+    """读取两块后出错的文件对象"""
+    def __init__(self):
+        self.calls = 0
+
+    def read(self, size):
+        self.calls += 1
+        if self.calls > 2:
+            raise OSError("read failed")
+        return b"x" * size
+
+
+def _chunk_count(db):
+    return db.conn.execute("SELECT COUNT(*) FROM attachment_chunks").fetchone()[0]
+
+
+def test_attachment_round_trip(tmp_path):
+    """多块附件和空附件加密保存后能原样读出，删除附件时数据块一并删除"""
+    db = Database("master", str(tmp_path / "accounts.db"))
+    account_id = db.add_account("GitHub", "me", "secret")
+    data = os.urandom(ATTACHMENT_CHUNK_SIZE * 2 + 123)
+
+    big_id = db.add_attachment(account_id, "key.bin", io.BytesIO(data))
+    empty_id = db.add_attachment(account_id, "empty.txt", io.BytesIO(b""))
+    assert [(a['filename'], a['size']) for a in db.get_attachments(account_id)] == [
+        ("key.bin", len(data)), ("empty.txt", 0)
+    ]
+    assert _chunk_count(db) == 3
+    # 存储的是密文
+    stored = db.conn.execute("SELECT data FROM attachment_chunks WHERE chunk_index = 0").fetchone()[0]
+    assert stored != data[:ATTACHMENT_CHUNK_SIZE]
+
+    out = io.BytesIO()
+    assert db.export_attachment(big_id, out) == len(data)
+    assert out.getvalue() == data
+    assert b"".join(db.read_attachment(empty_id)) == b""
+
+    assert db.delete_attachment(big_id)
+    assert _chunk_count(db) == 0
+    assert not db.delete_attachment(big_id)
+    db.close()
+
+
+def test_attachment_failed_read_rolls_back(tmp_path):
+    db = Database("master", str(tmp_path / "accounts.db"))
+    account_id = db.add_account("GitHub", "me", "secret")
+    with pytest.raises(OSError):
+        db.add_attachment(account_id, "broken.bin", _FailingReader())
+    assert db.get_attachments(account_id) == []
+    assert _chunk_count(db) == 0
+    db.close()
+
+
+def test_attachments_removed_with_account(tmp_path):
+    db = Database("master", str(tmp_path / "accounts.db"))
+    account_id = db.add_account("GitHub", "me", "secret")
+    db.add_attachment(account_id, "key.bin", io.BytesIO(b"k" * (ATTACHMENT_CHUNK_SIZE + 1)))
+    db.delete_account(account_id)
+    assert db.conn.execute("SELECT COUNT(*) FROM attachments").fetchone()[0] == 0
+    assert _chunk_count(db) == 0
+    db.close()
+
+
+def test_tag_counts_follow_changes(tmp_path):
+    """标签计数由触发器维护，随增删改和删除账号同步变化"""
+    db = Database("master", str(tmp_path / "accounts.db"))
+    first = db.add_account("GitHub", "me", "p1")
+    second = db.add_account("Bank", "me", "p2")
+    counts = lambda: {tag['name']: tag['count'] for tag in db.get_tag_counts()}
+
+    db.add_tag(first, "work")
+    db.add_tag(second, "Work")
+    db.add_tag(second, "work")
+    assert counts() == {"work": 2}
+
+    db.set_account_tags(first, ["personal", "Personal", "dev"])
+    assert counts() == {"work": 1, "personal": 1, "dev": 1}
+    assert db.get_account_tags(first) == ["dev", "personal"]
+
+    assert db.remove_tag(second, "WORK")
+    assert not db.remove_tag(second, "work")
+    db.set_account_tags(second, ["dev"])
+    assert counts() == {"personal": 1, "dev": 2}
+
+    assert db.delete_tag("personal")
+    assert db.get_account_tags(first) == ["dev"]
+    db.delete_account(first)
+    assert counts() == {"dev": 1}
+    db.close()
+
+
+def test_filter_accounts_by_tags(tmp_path):
+    db = Database("master", str(tmp_path / "accounts.db"))
+    github = db.add_account("GitHub", "me", "p1")
+    bank = db.add_account("Bank", "me", "p2")
+    db.add_account("Mail", "me", "p3")
+    db.set_account_tags(github, ["work", "dev"])
+    db.set_account_tags(bank, ["work"])
+    sites = lambda *args, **kwargs: [a['site_name'] for a in db.filter_accounts_by_tags(*args, **kwargs)]
+
+    assert sites(["work", "dev"]) == ["GitHub"]
+    assert sites(["work", "Work"]) == ["Bank", "GitHub"]
+    assert sites(["work", "missing"]) == []
+    assert sites(["dev", "missing"], match_all=False) == ["GitHub"]
+    assert sites(["work", "dev"], match_all=False) == ["Bank", "GitHub"]
+    assert sites(["work"], keyword="git") == ["GitHub"]
+    assert db.filter_accounts_by_tags(["dev"])[0]['password'] == "p1"
+    db.close()
@@ -0,0 +1,22 @@
+import io
+import json
+from database import Database
+from main import CommandLine, build_parser
+
+
+def test_import_reports_invalid_records_per_line(tmp_path):
+    """类型不对的记录逐行报错，其余记录照常导入"""
+    db = Database("master", str(tmp_path / "accounts.db"))
+    stdin = io.StringIO(
+        '{"site_name": "a", "username": "b", "password": 1}\n'
+        '{"site_name": null, "username": "b", "password": "x"}\n'
+        '{"site_name": "GitHub", "username": "me", "password": "secret"}\n'
+    )
+    stdout = io.StringIO()
+    exit_code = CommandLine(db, stdin, stdout).run(build_parser().parse_args(["import"]))
+
+    output = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert exit_code == 1
+    assert [record.get('line') for record in output if 'error' in record] == [1, 2]
+    assert [account['site_name'] for account in db.list_accounts()] == ["GitHub"]
+    db.close()
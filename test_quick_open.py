@@ -0,0 +1,56 @@
+import random
+import string
+import timeit
+from quick_open import SCORE_USER_WORD_SUBSTRING, FuzzyIndex
+
+
+def _index(accounts):
+    index = FuzzyIndex()
+    index.build([{'id': i, 'site_name': site, 'username': user} for i, (site, user) in enumerate(accounts)])
+    return index
+
+
+def test_best_matches_not_truncated():
+    """大量较弱的候选不应挤掉最佳匹配"""
+    accounts = [(f"GitKraken{i}", "me") for i in range(1000)]
+    accounts += [(f"Mailchimp{i}", "me") for i in range(1000)]
+    accounts += [(f"Site{i}", f"user{i}.git@example.com") for i in range(1000)]
+    accounts += [("GitHub", "me"), ("Mailbox", "me")]
+    index = _index(accounts)
+
+    git = [r['site_name'] for r in index.search("git", 3)]
+    assert git[0] == "GitHub"
+    assert index.search("mail", 1)[0]['site_name'] == "Mailbox"
+    # 单词中间的两字符子串同样可以匹配
+    assert index.search("ox", 1)[0]['site_name'] == "Mailbox"
+
+
+def test_initials_and_typos():
+    index = _index([("GitHub", "me"), ("Bank of America", "me"), ("Gmail", "me")])
+    assert index.search("gh", 1)[0]['site_name'] == "GitHub"
+    assert index.search("boa", 1)[0]['site_name'] == "Bank of America"
+    assert index.search("githbu", 1)[0]['site_name'] == "GitHub"
+    index.remove(0)
+    assert all(r['site_name'] != "GitHub" for r in index.search("github"))
+
+
+def test_search_speed_on_large_vault():
+    """10万条记录上常见查询（含邮箱域名）取前20条应在5毫秒内完成"""
+    rng = random.Random(0)
+    words = ["git", "hub", "lab", "bank", "mail", "cloud", "shop", "pay", "net", "soft",
+             "amazon", "google", "face", "book", "drop", "box", "dev", "stack", "over", "flow", "qq"]
+    domains = ["gmail.com", "qq.com", "163.com", "outlook.com"]
+    accounts = []
+    for _ in range(100000):
+        site = "".join(rng.choice(words).capitalize() for _ in range(rng.randint(1, 3)))
+        site += " " + "".join(rng.choices(string.ascii_lowercase, k=3))
+        user = "".join(rng.choices(string.ascii_lowercase + string.digits, k=8)) + "@" + rng.choice(domains)
+        accounts.append((site, user))
+    index = _index(accounts)
+
+    for query in ["com", "gmail", "gmail.com", "163", "qq", "a", "gh", "git", "mail",
+                  "stakoverflow", "githbu", "zzzz", "xq"]:
+        elapsed = min(timeit.repeat(lambda: index.search(query, 20), number=1, repeat=5))
+        assert elapsed < 0.005, (query, elapsed)
+    assert index.search("stakoverflow", 1)[0]['site_name'].lower().replace(" ", "").startswith("stackoverflow")
+    assert index.search("gmail.com", 20)[0]['score'] == SCORE_USER_WORD_SUBSTRING
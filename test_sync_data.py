@@ -0,0 +1,95 @@
+import shutil
+import sqlite3
+from database import Database
+from sync_data import sync_databases
+
+
+def _open(tmp_path, name):
+    return Database("master", str(tmp_path / name))
+
+
+def test_report_mode_does_not_stall(tmp_path):
+    """报告模式下的冲突不应阻塞其他记录的同步点"""
+    local_db = _open(tmp_path, "local.db")
+    remote_db = _open(tmp_path, "remote.db")
+    conflict_id = local_db.add_account("GitHub", "me", "p1")
+    clean_id = local_db.add_account("Bank", "me", "p2")
+    sync_databases(local_db, remote_db)
+
+    remote_conflict_id = {a['site_name']: a['id'] for a in remote_db.get_all_accounts()}["GitHub"]
+    local_db.update_account(conflict_id, notes="local")
+    remote_db.update_account(remote_conflict_id, notes="remote")
+    local_db.update_account(clean_id, notes="clean")
+
+    first = sync_databases(local_db, remote_db, "report")
+    assert len(first['conflicts']) == 1
+    assert first['sent'] == 1 and first['received'] == 0
+
+    # 再次同步：冲突仍只有一条，已同步的修改不会被重复发送
+    second = sync_databases(local_db, remote_db, "report")
+    assert second['conflicts'] == first['conflicts']
+    assert second['sent'] == 0 and second['received'] == 0
+    assert {a['site_name']: a['notes'] for a in remote_db.get_all_accounts()} == {"GitHub": "remote", "Bank": "clean"}
+
+    # 以最后修改时间为准解决冲突后不再报告
+    sync_databases(local_db, remote_db)
+    third = sync_databases(local_db, remote_db, "report")
+    assert third['conflicts'] == []
+    notes = lambda db: {a['site_name']: a['notes'] for a in db.get_all_accounts()}
+    assert notes(local_db) == notes(remote_db)
+    local_db.close()
+    remote_db.close()
+
+
+def test_copied_vault_is_rekeyed(tmp_path):
+    """直接复制出来的数据库同步时应获得新标识，不与原库共用同步点"""
+    original = _open(tmp_path, "a.db")
+    original.add_account("GitHub", "me", "p1")
+    original.close()
+    shutil.copy2(tmp_path / "a.db", tmp_path / "b.db")
+    shutil.copy2(tmp_path / "a.db", tmp_path / "c.db")
+
+    a = _open(tmp_path, "a.db")
+    b = _open(tmp_path, "b.db")
+    c = _open(tmp_path, "c.db")
+    assert sync_databases(a, b)['rekeyed']
+    assert sync_databases(a, c)['rekeyed']
+    assert b.get_vault_id() != c.get_vault_id()
+
+    # A 与 B 同步后的新修改仍能传到 C
+    a.add_account("Mail", "me", "p2")
+    sync_databases(a, b)
+    assert sync_databases(a, c)['sent'] == 1
+    assert sorted(acc['site_name'] for acc in c.get_all_accounts()) == ["GitHub", "Mail"]
+    for db in (a, b, c):
+        db.close()
+
+
+def test_copied_legacy_vault_does_not_duplicate(tmp_path):
+    """旧版本数据库复制到两处后分别升级，首次同步不应产生重复记录"""
+    legacy = sqlite3.connect(str(tmp_path / "a.db"))
+    legacy.execute(
+        "CREATE TABLE accounts (id INTEGER PRIMARY KEY, site_name TEXT NOT NULL, username TEXT NOT NULL, "
+        "password TEXT NOT NULL, notes TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    legacy.execute("INSERT INTO accounts (site_name, username, password, notes) VALUES ('GitHub', 'me', 'x', '')")
+    legacy.execute("INSERT INTO accounts (site_name, username, password, notes) VALUES ('Bank', 'me', 'y', '')")
+    legacy.commit()
+    legacy.close()
+    shutil.copy2(tmp_path / "a.db", tmp_path / "b.db")
+
+    # 升级前在一端修改过的记录两端都保留
+    edited = sqlite3.connect(str(tmp_path / "b.db"))
+    edited.execute("UPDATE accounts SET notes = 'edited' WHERE site_name = 'Bank'")
+    edited.commit()
+    edited.close()
+
+    a = _open(tmp_path, "a.db")
+    b = _open(tmp_path, "b.db")
+    result = sync_databases(a, b)
+    assert result['sent'] == 1 and result['received'] == 1
+    for db in (a, b):
+        assert sorted((acc['site_name'], acc['notes']) for acc in db.get_all_accounts()) == [
+            ("Bank", ""), ("Bank", "edited"), ("GitHub", "")
+        ]
+        db.close()